@@ -0,0 +1,251 @@
+import argparse
+import json
+import random
+import sys
+import time
+from bisect import bisect_right
+
+import pandas as pd
+import requests
+
+import positions
+import spot_price
+
+# --- Headless price alert daemon ---
+# Every watched level (liquidation warnings, LP range edges, band Down levels) lives in one
+# sorted index. A tick only has to look at the slice of levels between the previous price and
+# the new one, found with two bisects, so each tick costs O(log n + hits) however many
+# wallets and bands are watched.
+#
+# A threshold may also carry "direction" (only alert on crossings that way) and "past"
+# ("below"/"above": the side that means the position needs attention). On the first tick,
+# every level the price is already past alerts straight away, so a daemon (re)started
+# under a liquidation warning doesn't wait for the next crossing to say so.
+#
+#   python alert_daemon.py --watchlist data/watchlist.json
+#   python alert_daemon.py --replay ticks.csv
+#   python alert_daemon.py --bench-thresholds 100000 --bench-ticks 1000000
+
+BANDS_CSV = "data/bands.csv"
+
+
+# --- Watched thresholds ---
+def liquidation_thresholds(name, supplied_eth, borrowed_usd, liq_threshold=0.80, warn_pcts=(0.10, 0.05)):
+    if supplied_eth <= 0:
+        return []
+    liq_price = borrowed_usd / (supplied_eth * liq_threshold)
+    # Moving up through these levels is moving out of danger, which isn't worth an alert
+    thresholds = [{
+        "key": f"{name}:liq",
+        "price": liq_price,
+        "label": f"{name} liquidation price",
+        "direction": "down",
+        "past": "below",
+    }]
+    for pct in warn_pcts:
+        thresholds.append({
+            "key": f"{name}:liq-{pct:.0%}",
+            "price": liq_price * (1 + pct),
+            "label": f"{name} within {pct:.0%} of liquidation (${liq_price:,.2f})",
+            "direction": "down",
+            "past": "below",
+        })
+    return thresholds
+
+
+def lp_range_thresholds(name, lp_low, lp_high):
+    return [
+        {"key": f"{name}:lp-low", "price": lp_low, "label": f"{name} range lower bound", "past": "below"},
+        {"key": f"{name}:lp-high", "price": lp_high, "label": f"{name} range upper bound", "past": "above"},
+    ]
+
+
+def band_thresholds(df_bands):
+    thresholds = []
+    for _, row in df_bands.iterrows():
+        for level in ["Min", "Max", "Down5", "Down10", "Down15"]:
+            if level in row and pd.notna(row[level]):
+                thresholds.append({
+                    "key": f"{row['Label']}:{level}",
+                    "price": float(row[level]),
+                    "label": f"{row['Label']} {level}",
+                })
+    return thresholds
+
+
+def load_watchlist(path):
+    with open(path) as f:
+        config = json.load(f)
+    thresholds = []
+    for wallet in config.get("wallets", []):
+        thresholds += liquidation_thresholds(
+            wallet["name"],
+            wallet["supplied_eth"],
+            wallet["borrowed_usd"],
+            wallet.get("liq_threshold", 0.80),
+            tuple(wallet.get("warn_pcts", (0.10, 0.05))),
+        )
+    for lp in config.get("lp_ranges", []):
+        thresholds += lp_range_thresholds(lp["name"], lp["low"], lp["high"])
+    if config.get("bands_csv"):
+        thresholds += band_thresholds(pd.read_csv(config["bands_csv"]))
+    return thresholds
+
+
+def default_watchlist():
+    thresholds = liquidation_thresholds("Loop 1", positions.SUPPLIED_ETH, positions.BORROWED_USD)
+    thresholds += lp_range_thresholds("LP", *positions.LP_RANGE)
+    try:
+        thresholds += band_thresholds(pd.read_csv(BANDS_CSV))
+    except FileNotFoundError:
+        pass
+    return thresholds
+
+
+# --- Threshold index ---
+def build_index(thresholds):
+    records = sorted(thresholds, key=lambda t: t["price"])
+    return [t["price"] for t in records], records
+
+
+def crossed(index, last_price, price):
+    # Levels strictly above the lower price and at or below the higher one
+    prices, records = index
+    lo, hi = (last_price, price) if last_price <= price else (price, last_price)
+    return records[bisect_right(prices, lo):bisect_right(prices, hi)]
+
+
+def already_past(index, price):
+    # Levels the price is already on the "past" side of, nearest first
+    prices, records = index
+    i = bisect_right(prices, price)
+    below = [t for t in records[i:] if t.get("past") == "below"]
+    above = [t for t in reversed(records[:i]) if t.get("past") == "above"]
+    return below + above
+
+
+# --- Sinks ---
+def print_sink(alert):
+    print(json.dumps(alert), flush=True)
+
+
+def webhook_sink(url):
+    def send(alert):
+        try:
+            requests.post(url, json=alert, timeout=5)
+        except requests.RequestException as e:
+            print(f"Webhook failed: {e}", file=sys.stderr)
+    return send
+
+
+def null_sink(alert):
+    pass
+
+
+# --- Feeds ---
+def live_feed(interval=15):
+    while True:
+        try:
+            yield time.time(), spot_price.get_spot_price()["price"]
+        except spot_price.PriceUnavailable as e:
+            print(f"Price fetch failed, skipping tick: {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def replay_feed(path):
+    df = pd.read_csv(path)
+    ts = (pd.to_datetime(df["timestamp"], utc=True) - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)
+    return zip(ts.tolist(), df["price"].astype(float).tolist())
+
+
+def random_walk_feed(n_ticks, start_price=2500.0, step=2.0, seed=0):
+    rng = random.Random(seed)
+    price = start_price
+    for i in range(n_ticks):
+        price = max(1.0, price + rng.gauss(0, step))
+        yield float(i), price
+
+
+# --- Main loop ---
+def run(feed, index, sink, cooldown=300):
+    last_price = None
+    last_fired = {}
+    ticks = alerts = 0
+    for ts, price in feed:
+        ticks += 1
+        if last_price is None:
+            for t in already_past(index, price):
+                last_fired[t["key"]] = ts
+                alerts += 1
+                sink({
+                    "ts": ts,
+                    "key": t["key"],
+                    "label": t["label"],
+                    "level": round(t["price"], 2),
+                    "price": round(price, 2),
+                    "direction": t["past"],
+                })
+        elif price != last_price:
+            direction = "up" if price > last_price else "down"
+            hits = crossed(index, last_price, price)
+            # Report levels in the order price passed through them
+            for t in (hits if direction == "up" else reversed(hits)):
+                if t.get("direction", direction) != direction:
+                    continue
+                fired = last_fired.get(t["key"])
+                if fired is not None and ts - fired < cooldown:
+                    continue
+                last_fired[t["key"]] = ts
+                alerts += 1
+                sink({
+                    "ts": ts,
+                    "key": t["key"],
+                    "label": t["label"],
+                    "level": round(t["price"], 2),
+                    "price": round(price, 2),
+                    "direction": direction,
+                })
+        last_price = price
+    return ticks, alerts
+
+
+def bench(n_thresholds, n_ticks, cooldown=300):
+    rng = random.Random(1)
+    thresholds = [
+        {"key": f"t{i}", "price": rng.uniform(1500, 3500), "label": f"threshold {i}"}
+        for i in range(n_thresholds)
+    ]
+    index = build_index(thresholds)
+    start = time.perf_counter()
+    ticks, alerts = run(random_walk_feed(n_ticks), index, null_sink, cooldown)
+    elapsed = time.perf_counter() - start
+    print(f"{n_thresholds:,} thresholds, {ticks:,} ticks, {alerts:,} alerts in {elapsed:.2f}s "
+          f"= {ticks / elapsed:,.0f} ticks/sec")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless ETH price alert daemon")
+    parser.add_argument("--watchlist", help="JSON file with wallets, lp_ranges and bands_csv")
+    parser.add_argument("--replay", help="CSV of timestamp,price ticks to replay instead of polling")
+    parser.add_argument("--interval", type=float, default=15, help="Live polling interval (seconds)")
+    parser.add_argument("--cooldown", type=float, default=300, help="Seconds before the same level can alert again")
+    parser.add_argument("--webhook", help="POST alerts to this URL instead of printing them")
+    parser.add_argument("--bench-thresholds", type=int, help="Benchmark with this many random thresholds")
+    parser.add_argument("--bench-ticks", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    if args.bench_thresholds:
+        bench(args.bench_thresholds, args.bench_ticks, args.cooldown)
+        return
+
+    thresholds = load_watchlist(args.watchlist) if args.watchlist else default_watchlist()
+    index = build_index(thresholds)
+    sink = webhook_sink(args.webhook) if args.webhook else print_sink
+    feed = replay_feed(args.replay) if args.replay else live_feed(args.interval)
+    print(f"Watching {len(thresholds):,} levels", file=sys.stderr)
+    ticks, alerts = run(feed, index, sink, args.cooldown)
+    print(f"Processed {ticks:,} ticks, {alerts:,} alerts", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
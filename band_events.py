@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+# --- Vectorized band-crossing event detection ---
+# All band edges (Min/Max) and drawdown levels (DownN) are flattened into two sorted
+# threshold arrays. Ranking each close with searchsorted turns "which thresholds did price
+# cross between two candles" into a slice of the sorted array, and ranking each candle's
+# low/high does the same for wick touches, so the cost is O((candles + bands) log n + events).
+
+EDGE_LEVELS = ["Min", "Max"]
+DRAWDOWN_LEVELS = ["Down5", "Down10", "Down15"]
+EVENT_TYPES = ["entered", "exited"] + [f"touched_{level}" for level in DRAWDOWN_LEVELS]
+EVENT_COLUMNS = ["timestamp", "band", "Label", "event", "level", "price"]
+
+
+def _thresholds(df_bands, levels):
+    values, band_idx, level_idx = [], [], []
+    for i, level in enumerate(levels):
+        if level not in df_bands.columns:
+            continue
+        col = df_bands[level].to_numpy(dtype=float)
+        keep = ~np.isnan(col)
+        values.append(col[keep])
+        band_idx.append(np.flatnonzero(keep))
+        level_idx.append(np.full(keep.sum(), i))
+    if not values:
+        return np.empty(0), np.empty(0, dtype=int), np.empty(0, dtype=int)
+    values = np.concatenate(values)
+    order = np.argsort(values, kind="stable")
+    return values[order], np.concatenate(band_idx)[order], np.concatenate(level_idx)[order]
+
+
+def _expand(lo, hi):
+    # Turn per-row [lo, hi) slices into flat (row, position) pairs without a Python loop
+    counts = hi - lo
+    rows = np.repeat(np.arange(len(lo)), counts)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return rows, np.repeat(lo, counts) + np.arange(counts.sum()) - starts
+
+
+def _candle_times(df_candles):
+    if "timestamp" in df_candles.columns:
+        return pd.DatetimeIndex(df_candles["timestamp"])
+    return pd.DatetimeIndex(df_candles.index)
+
+
+def _event_frame(times, df_bands, candle_idx, band_idx, event, level, price):
+    if "Label" in df_bands.columns:
+        labels = df_bands["Label"].astype(str).to_numpy()
+    else:
+        labels = np.arange(len(df_bands)).astype(str)
+    return pd.DataFrame({
+        "timestamp": times[candle_idx],
+        "band": band_idx,
+        "Label": labels[band_idx],
+        "event": event,
+        "level": level,
+        "price": price,
+    })
+
+
+def crossing_events(df_candles, df_bands):
+    df_bands = df_bands.reset_index(drop=True)
+    times = _candle_times(df_candles)
+    close = df_candles["close"].to_numpy(dtype=float)
+    low = df_candles["low"].to_numpy(dtype=float)
+    high = df_candles["high"].to_numpy(dtype=float)
+    # +1 / -1 per candle by the direction of its close, so events within one candle can be
+    # ordered the way price moved through them (descending levels on a move down)
+    step = np.where(np.diff(close, prepend=close[:1]) < 0, -1.0, 1.0)
+    frames = []
+
+    # Entered / exited: thresholds crossed between consecutive closes.
+    # A close counts as inside a band when Min <= close < Max.
+    edges, edge_band, edge_level = _thresholds(df_bands, EDGE_LEVELS)
+    if len(edges) and len(close) > 1:
+        rank = np.searchsorted(edges, close, side="right")
+        prev, cur = rank[:-1], rank[1:]
+        rows, pos = _expand(np.minimum(prev, cur), np.maximum(prev, cur))
+        moved_up = cur[rows] > prev[rows]
+        is_min = edge_level[pos] == 0
+        entered = is_min == moved_up
+        frames.append(_event_frame(
+            times, df_bands, rows + 1, edge_band[pos],
+            np.where(entered, "entered", "exited"),
+            np.array(EDGE_LEVELS)[edge_level[pos]],
+            edges[pos],
+        ).assign(order=edges[pos] * step[rows + 1]))
+
+    # Touched DownN: thresholds inside a candle's [low, high] range, first candle of each run only
+    levels, level_band, level_idx = _thresholds(df_bands, DRAWDOWN_LEVELS)
+    if len(levels) and len(close):
+        lo = np.searchsorted(levels, low, side="left")
+        hi = np.searchsorted(levels, high, side="right")
+        rows, pos = _expand(lo, np.maximum(lo, hi))
+        key = pos * len(close) + rows
+        first_touch = ~np.isin(key - 1, key) | (rows == 0)
+        rows, pos = rows[first_touch], pos[first_touch]
+        names = np.array(DRAWDOWN_LEVELS)[level_idx[pos]]
+        frames.append(_event_frame(
+            times, df_bands, rows, level_band[pos],
+            np.char.add("touched_", names),
+            names,
+            levels[pos],
+        ).assign(order=levels[pos] * step[rows]))
+
+    if not frames:
+        events = pd.DataFrame(columns=EVENT_COLUMNS)
+    else:
+        events = pd.concat(frames, ignore_index=True)
+        events = events.sort_values(["timestamp", "order", "band"], kind="stable")
+        events = events.drop(columns="order").reset_index(drop=True)
+    events["event"] = pd.Categorical(events["event"], categories=EVENT_TYPES)
+    return events
+
+
+def band_stats(df_candles, df_bands, events=None):
+    df_bands = df_bands.reset_index(drop=True)
+    if events is None:
+        events = crossing_events(df_candles, df_bands)
+    close = df_candles["close"].to_numpy(dtype=float)
+    sorted_close = np.sort(close)
+
+    band_min = df_bands["Min"].to_numpy(dtype=float)
+    band_max = df_bands["Max"].to_numpy(dtype=float)
+    candles_in_band = np.searchsorted(sorted_close, band_max, side="left") - np.searchsorted(sorted_close, band_min, side="left")
+
+    counts = pd.DataFrame(0, index=df_bands.index, columns=EVENT_TYPES)
+    if not events.empty:
+        counts = events.groupby(["band", "event"], observed=False).size().unstack("event").reindex(
+            index=df_bands.index, columns=EVENT_TYPES, fill_value=0
+        )
+    last_event = events.groupby("band")["timestamp"].max().reindex(df_bands.index)
+
+    stats = pd.DataFrame({
+        "Label": df_bands["Label"] if "Label" in df_bands.columns else df_bands.index.astype(str),
+        "Min": band_min,
+        "Max": band_max,
+        "candles_in_band": np.maximum(candles_in_band, 0),
+        "pct_time_in_band": np.maximum(candles_in_band, 0) / len(close) if len(close) else 0.0,
+        "in_band_now": (band_min <= close[-1]) & (close[-1] < band_max) if len(close) else False,
+        "last_event": last_event,
+    })
+    return pd.concat([stats, counts.rename(columns=lambda c: f"{c}_count")], axis=1)
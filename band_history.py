@@ -0,0 +1,216 @@
+import os
+import threading
+import uuid
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc as ipc
+
+# --- Append-only columnar history of band definitions and ETH spot snapshots ---
+# Every append writes an immutable Arrow IPC segment named "<first_ms>_<last_ms>_<id>.arrow".
+# The file names are the time index: a range query only memory-maps the segments whose
+# span overlaps the requested range, and never touches Google Sheets or bands.csv.
+# Rows inside a segment are sorted by ts, so the range is cut out of each segment with a
+# searchsorted and a zero-copy slice. The first write of each UTC day merges the previous
+# days' segments into one, which keeps the segment count bounded.
+
+HISTORY_DIR = "data/history"
+BAND_COLUMNS = ["Label", "Min", "Max", "Down5", "Down10", "Down15"]
+TS_TYPE = pa.timestamp("ms", tz="UTC")
+
+SCHEMAS = {
+    "bands": pa.schema(
+        [("ts", TS_TYPE), ("source", pa.string()), ("Label", pa.string())]
+        + [(col, pa.float64()) for col in BAND_COLUMNS[1:]]
+    ),
+    "spot": pa.schema([("ts", TS_TYPE), ("source", pa.string()), ("price", pa.float64())]),
+}
+
+# Last value written per (kind, source), so Streamlit reruns don't append duplicates
+_last_written = {}
+# UTC day each kind was last compacted by this process
+_compacted_on = {}
+# Streamlit runs each session in its own thread: compaction, and reads that could see a
+# half-finished compaction (merged segment written, sources not yet removed), hold this lock
+_lock = threading.RLock()
+
+
+def _to_ms(value):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value // 1_000_000)
+
+
+def _now_ms():
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def _kind_dir(kind):
+    path = os.path.join(HISTORY_DIR, kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _list_segments(kind):
+    segments = []
+    for name in os.listdir(_kind_dir(kind)):
+        if name.endswith(".arrow"):
+            first, last = name[:-len(".arrow")].split("_")[:2]
+            segments.append((int(first), int(last), name))
+    segments.sort()
+    return segments
+
+
+def _write_segment(kind, table):
+    ts = table["ts"].cast(pa.int64())
+    first, last = pc.min(ts).as_py(), pc.max(ts).as_py()
+    path = os.path.join(_kind_dir(kind), f"{first:013d}_{last:013d}_{uuid.uuid4().hex[:8]}.arrow")
+    tmp_path = path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _read_segment(path):
+    # Buffers point straight into the mapped file; nothing is copied until pandas needs it
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _slice_segment(table, start_ms, end_ms):
+    ts = table["ts"].cast(pa.int64()).to_numpy()
+    lo = int(np.searchsorted(ts, start_ms, side="left")) if start_ms is not None else 0
+    hi = int(np.searchsorted(ts, end_ms, side="right")) if end_ms is not None else len(ts)
+    return table.slice(lo, max(hi - lo, 0))
+
+
+def _query(kind, start=None, end=None):
+    with _lock:
+        return _query_segments(kind, start, end)
+
+
+def _query_segments(kind, start, end):
+    schema = SCHEMAS[kind]
+    start_ms, end_ms = _to_ms(start), _to_ms(end)
+    segments = _list_segments(kind)
+    if end_ms is not None:
+        segments = segments[:bisect_right([s[0] for s in segments], end_ms)]
+    if start_ms is not None:
+        segments = [s for s in segments if s[1] >= start_ms]
+
+    kind_dir = _kind_dir(kind)
+    tables = []
+    for _, _, name in segments:
+        try:
+            table = _read_segment(os.path.join(kind_dir, name))
+        except FileNotFoundError:
+            continue  # merged away by compaction (e.g. in another process) since it was listed
+        tables.append(_slice_segment(table, start_ms, end_ms))
+    if not tables:
+        return schema.empty_table()
+
+    table = pa.concat_tables(tables)
+    overlapping = any(b[0] < a[1] for a, b in zip(segments, segments[1:]))
+    # Segments are ordered by first ts, so only overlapping spans need a (copying) sort
+    return table.sort_by("ts") if overlapping else table
+
+
+def _append(kind, frame, source, ts=None):
+    key = (kind, source)
+    fingerprint = frame.to_json()
+    if _last_written.get(key) == fingerprint:
+        return None
+
+    frame = frame.copy()
+    frame.insert(0, "source", source)
+    frame.insert(0, "ts", pd.Timestamp(_to_ms(ts) if ts is not None else _now_ms(), unit="ms", tz="UTC"))
+    table = pa.Table.from_pandas(frame, schema=SCHEMAS[kind], preserve_index=False)
+    path = _write_segment(kind, table)
+    _last_written[key] = fingerprint
+
+    today = datetime.now(timezone.utc).date()
+    with _lock:
+        if _compacted_on.get(kind) != today:
+            compact(kind)
+            _compacted_on[kind] = today
+    return path
+
+
+# --- Parsing ---
+def parse_band_text(input_text):
+    lines = input_text.strip().split("\n")
+    band_line = lines[0]
+    row = {"Label": band_line.split("|")[0].strip() if "|" in band_line else "Band"}
+    for kv in band_line.split("|"):
+        if "=" in kv:
+            key, val = kv.split("=")
+            key = key.strip()
+            if key in BAND_COLUMNS:
+                row[key] = float(val.strip().replace("%", ""))
+    for line in lines[1:]:
+        for kv in line.split("|"):
+            if "Down" in kv and "=" in kv:
+                label, val = kv.split("=")
+                if label.strip() in BAND_COLUMNS:
+                    row[label.strip()] = float(val.strip())
+                break
+    if "Min" not in row or "Max" not in row:
+        raise ValueError("Band line must contain Min= and Max=")
+    return row
+
+
+# --- Writes ---
+def record_bands(df_bands, source, ts=None):
+    frame = pd.DataFrame(df_bands).reindex(columns=BAND_COLUMNS)
+    frame["Label"] = frame["Label"].astype(str)
+    frame[BAND_COLUMNS[1:]] = frame[BAND_COLUMNS[1:]].astype(float)
+    return _append("bands", frame.reset_index(drop=True), source, ts)
+
+
+def record_spot(price, source, ts=None):
+    if price is None:
+        return None
+    return _append("spot", pd.DataFrame({"price": [float(price)]}), source, ts)
+
+
+# --- Reads ---
+def load_bands(start=None, end=None):
+    return _query("bands", start, end).to_pandas(split_blocks=True)
+
+
+def load_spot(start=None, end=None):
+    return _query("spot", start, end).to_pandas(split_blocks=True)
+
+
+def bands_as_of(when):
+    # Each source's latest snapshot at or before `when`; bands that source has since dropped are not returned
+    df = load_bands(end=when)
+    if df.empty:
+        return df
+    latest = df.groupby("source")["ts"].transform("max")
+    return df[df["ts"] == latest].reset_index(drop=True)
+
+
+def compact(kind, before=None):
+    # Merge all segments that end before `before` (default: start of today, UTC) into one
+    before_ms = _to_ms(before) if before is not None else _to_ms(pd.Timestamp.now(tz="UTC").normalize())
+    kind_dir = _kind_dir(kind)
+    with _lock:
+        closed = [name for _, last, name in _list_segments(kind) if last < before_ms]
+        if len(closed) < 2:
+            return None
+
+        tables = [_read_segment(os.path.join(kind_dir, name)) for name in closed]
+        table = pa.concat_tables(tables).sort_by("ts").combine_chunks()
+        path = _write_segment(kind, table)
+        for name in closed:
+            os.remove(os.path.join(kind_dir, name))
+        return path
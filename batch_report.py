@@ -0,0 +1,196 @@
+import argparse
+import html
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import requests
+
+import charts
+import heatmap_ocr
+import positions
+import spot_price
+
+# --- Headless batch report ---
+# Renders every band chart, drawdown chart, liquidation overlay and LP exit table into one
+# HTML (optionally PDF) bundle without Streamlit. The candle set is fetched, and its Heikin-Ashi
+# computed, once in the parent and handed to each worker process a single time through the
+# pool initializer.
+#
+#   python batch_report.py --bands data/bands.csv --out reports/
+#   python batch_report.py --synthetic-bands 200 --workers 8 --pdf
+
+COINGECKO_OHLC = "https://api.coingecko.com/api/v3/coins/ethereum/ohlc?vs_currency=usd&days=1"
+BANDS_CSV = "data/bands.csv"
+SCENARIO_PRICES = np.arange(1000, 5001, 250)
+
+_shared = {}
+
+
+# --- Inputs ---
+def fetch_ohlc():
+    r = requests.get(COINGECKO_OHLC, timeout=15)
+    r.raise_for_status()
+    raw = r.json()
+    candles = pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close"])
+    candles["timestamp"] = pd.to_datetime(candles["timestamp"], unit="ms")
+    klines = pd.DataFrame(raw, columns=["timestamp", "Open", "High", "Low", "Close"])
+    klines["Open Time"] = pd.to_datetime(klines["timestamp"], unit="ms")
+    return candles, charts.heikin_ashi_klines(klines)
+
+
+def load_bands(path, synthetic, eth_price):
+    if synthetic:
+        rng = np.random.default_rng(0)
+        center = eth_price or 2500.0
+        mins = np.round(center * rng.uniform(0.8, 1.1, synthetic), 0)
+        widths = np.round(center * rng.uniform(0.03, 0.10, synthetic), 0)
+        return pd.DataFrame({
+            "Label": [f"Band {i + 1}" for i in range(synthetic)],
+            "Min": mins,
+            "Max": mins + widths,
+            "Down5": mins * 0.95,
+            "Down10": mins * 0.90,
+            "Down15": mins * 0.85,
+        })
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    import band_history
+    return band_history.bands_as_of(pd.Timestamp.now(tz="UTC"))
+
+
+# --- Workers ---
+def _init_worker(candles, ha_df, klines, clusters, eth_price, out_dir):
+    _shared.update(candles=candles, ha_df=ha_df, klines=klines, clusters=clusters, eth_price=eth_price, out_dir=out_dir)
+
+
+def _save(fig, name):
+    path = os.path.join(_shared["out_dir"], name)
+    fig.savefig(path, dpi=90)
+    plt.close(fig)
+    return name
+
+
+def render_band(item):
+    i, row = item
+    fig_band, fig_dd = charts.band_figures(row, _shared["candles"], _shared["eth_price"], _shared["ha_df"])
+    fig_overlay = charts.liquidation_overlay_figure(_shared["klines"], (row["Min"], row["Max"]), _shared["clusters"])
+    return i, [
+        _save(fig_band, f"band_{i:04d}.png"),
+        _save(fig_dd, f"band_{i:04d}_drawdowns.png"),
+        _save(fig_overlay, f"band_{i:04d}_overlay.png"),
+    ]
+
+
+# --- Output ---
+def lp_exit_table(row):
+    df = charts.lp_exit_scenarios(
+        positions.ETH_STACK, positions.LOOP2_DEBT_USD, positions.FEES_EARNED_ETH, SCENARIO_PRICES
+    )
+    df.insert(1, "Range Status", np.where(
+        df["Scenario Price ($)"] > row["Max"], "above",
+        np.where(df["Scenario Price ($)"] < row["Min"], "below", "in"),
+    ))
+    return df
+
+
+def write_html(path, df_bands, images, eth_price, loop2):
+    parts = [
+        "<html><head><meta charset='utf-8'><title>ETH Band Report</title>",
+        "<style>body{font-family:sans-serif;margin:2em}img{max-width:100%}"
+        "table{border-collapse:collapse;font-size:12px}td,th{border:1px solid #ccc;padding:2px 6px}</style>",
+        "</head><body>",
+        f"<h1>ETH Band Report — {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC</h1>",
+        f"<p>ETH price: {'$%s' % format(eth_price, ',.2f') if eth_price else 'unavailable'}</p>",
+        "<h2>Loop 2 Evaluation</h2>",
+        loop2.to_html(index=False),
+    ]
+    for i, row in df_bands.iterrows():
+        parts.append(f"<h2>{html.escape(str(row['Label']))}</h2>")
+        parts += [f"<img src='{name}'>" for name in images[i]]
+        parts.append("<h3>LP Exit Scenarios</h3>")
+        parts.append(lp_exit_table(row).round(2).to_html(index=False))
+    parts.append("</body></html>")
+    with open(path, "w") as f:
+        f.write("\n".join(parts))
+
+
+def write_pdf(path, out_dir, df_bands, images):
+    from matplotlib.backends.backend_pdf import PdfPages
+    with PdfPages(path) as pdf:
+        for i in df_bands.index:
+            for name in images[i]:
+                img = plt.imread(os.path.join(out_dir, name))
+                fig = plt.figure(figsize=(img.shape[1] / 90, img.shape[0] / 90), dpi=90)
+                fig.figimage(img)
+                pdf.savefig(fig)
+                plt.close(fig)
+
+
+def peak_rss_mb():
+    # Linux reports ru_maxrss in KiB; children is the largest single worker, not the sum
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render all band charts and position tables without Streamlit")
+    parser.add_argument("--bands", default=BANDS_CSV, help="Band CSV (falls back to the latest band history)")
+    parser.add_argument("--clusters", default=heatmap_ocr.CLUSTERS_CSV,
+                        help="CSV of price,value_m liquidation clusters (saved by the ETH Liquidation Overlay page)")
+    parser.add_argument("--synthetic-bands", type=int, help="Generate this many bands instead of loading them")
+    parser.add_argument("--out", default="reports", help="Output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--pdf", action="store_true", help="Also bundle every chart into report.pdf")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    out_dir = os.path.join(args.out, datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+
+    try:
+        eth_price = spot_price.get_spot_price()["price"]
+    except spot_price.PriceUnavailable as e:
+        print(f"No live ETH price, charts will omit the spot line: {e}")
+        eth_price = None
+    candles, klines = fetch_ohlc()
+    df_bands = load_bands(args.bands, args.synthetic_bands, eth_price).reset_index(drop=True)
+    clusters = heatmap_ocr.load_clusters(args.clusters)
+    fetched = time.perf_counter()
+
+    items = [(i, row.to_dict()) for i, row in df_bands.iterrows()]
+    init_args = (candles, charts.heikin_ashi_frame(candles), klines, clusters, eth_price, out_dir)
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=init_args) as pool:
+            chunksize = max(1, len(items) // (args.workers * 4))
+            images = dict(pool.map(render_band, items, chunksize=chunksize))
+    else:
+        _init_worker(*init_args)
+        images = dict(map(render_band, items))
+    rendered = time.perf_counter()
+
+    loop2 = charts.loop2_table(positions.SUPPLIED_ETH, positions.BORROWED_USD, eth_price) if eth_price else pd.DataFrame()
+    write_html(os.path.join(out_dir, "index.html"), df_bands, images, eth_price, loop2)
+    if args.pdf:
+        write_pdf(os.path.join(out_dir, "report.pdf"), out_dir, df_bands, images)
+    done = time.perf_counter()
+
+    n_charts = sum(len(v) for v in images.values())
+    own, children = peak_rss_mb()
+    print(f"{len(df_bands)} bands, {n_charts} charts with {args.workers} workers -> {out_dir}")
+    print(f"Fetch {fetched - start:.1f}s, render {rendered - fetched:.1f}s "
+          f"({n_charts / (rendered - fetched):.1f} charts/sec), bundle {done - rendered:.1f}s, "
+          f"total {done - start:.1f}s")
+    print(f"Peak RSS: parent {own:.0f} MB, largest worker {children:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# --- Tick-to-candle aggregator ---
+# Ticks from any (ts, price) feed are folded into 1m/5m/15m/1h OHLC candles. Closed candles,
+# with their Heikin-Ashi values, go into a fixed-size ring buffer per timeframe. Each row is
+# written twice (at i and i + capacity), so the newest `capacity` candles are always one
+# contiguous slice: a single-threaded reader can use it without copying, and readers racing
+# the feed thread copy that one slice under the lock.
+#
+#   python candles.py ticks.csv          # replay a recorded timestamp,price file
+#   python candles.py --synthetic 1000000
+
+TIMEFRAMES = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600}
+COLUMNS = ["timestamp", "open", "high", "low", "close", "ha_open", "ha_high", "ha_low", "ha_close", "ticks"]
+TS, OPEN, HIGH, LOW, CLOSE, HA_OPEN, HA_HIGH, HA_LOW, HA_CLOSE, TICKS = range(len(COLUMNS))
+
+
+def new_aggregator(timeframes=TIMEFRAMES, capacity=1440):
+    return {
+        "capacity": capacity,
+        "lock": threading.Lock(),
+        "frames": {
+            tf: {
+                "seconds": seconds,
+                "buffer": np.full((2 * capacity, len(COLUMNS)), np.nan),
+                "closed": 0,
+                "current": None,
+                "callbacks": [],
+            }
+            for tf, seconds in timeframes.items()
+        },
+    }
+
+
+def on_close(agg, tf, callback):
+    # callback(tf, row) runs after every candle close on `tf`, once HA values are filled in.
+    # It runs outside the aggregator lock with its own copy of the row, so it may read the
+    # buffer through candles_frame.
+    agg["frames"][tf]["callbacks"].append(callback)
+
+
+def _close_candle(agg, tf, frame):
+    capacity = agg["capacity"]
+    bucket, open_, high, low, close, ticks = frame["current"]
+    buf = frame["buffer"]
+
+    ha_close = (open_ + high + low + close) / 4
+    if frame["closed"]:
+        prev = buf[(frame["closed"] - 1) % capacity]
+        ha_open = (prev[HA_OPEN] + prev[HA_CLOSE]) / 2
+    else:
+        ha_open = (open_ + close) / 2
+    row = (bucket, open_, high, low, close,
+           ha_open, max(high, ha_open, ha_close), min(low, ha_open, ha_close), ha_close, ticks)
+
+    pos = frame["closed"] % capacity
+    buf[pos] = row
+    buf[pos + capacity] = row
+    frame["closed"] += 1
+    frame["current"] = None
+    return buf[pos].copy()
+
+
+def ingest(agg, ts, price):
+    # The forming candle is a plain list [bucket, open, high, low, close, ticks]; it only
+    # becomes a buffer row when it closes
+    closed = []
+    with agg["lock"]:
+        for tf, frame in agg["frames"].items():
+            bucket = ts - ts % frame["seconds"]
+            current = frame["current"]
+            if current is not None and bucket > current[0]:
+                row = _close_candle(agg, tf, frame)
+                if frame["callbacks"]:
+                    closed.append((tf, row, list(frame["callbacks"])))
+                current = None
+            if current is None:
+                frame["current"] = [bucket, price, price, price, price, 1]
+            elif bucket == current[0]:
+                if price > current[2]:
+                    current[2] = price
+                elif price < current[3]:
+                    current[3] = price
+                current[4] = price
+                current[5] += 1
+            # else: late tick for a candle that has already closed
+    for tf, row, callbacks in closed:
+        for callback in callbacks:
+            callback(tf, row)
+
+
+def ingest_feed(agg, feed):
+    count = 0
+    for ts, price in feed:
+        ingest(agg, ts, price)
+        count += 1
+    return count
+
+
+# --- Reads ---
+def candles_view(agg, tf, n=None):
+    # Newest closed candles, oldest first, as a zero-copy view into the ring buffer. Once the
+    # buffer is full the next close overwrites the view's oldest row, so this is only safe
+    # when nothing ingests concurrently (e.g. replay and bench); use candles_frame otherwise.
+    frame = agg["frames"][tf]
+    capacity = agg["capacity"]
+    available = min(frame["closed"], capacity)
+    n = available if n is None else min(n, available)
+    end = (frame["closed"] - 1) % capacity + capacity + 1 if frame["closed"] else capacity
+    return frame["buffer"][end - n:end]
+
+
+def candles_frame(agg, tf, n=None):
+    # Copied under the lock, so a feed thread closing candles can't tear rows mid-read
+    with agg["lock"]:
+        rows = candles_view(agg, tf, n).copy()
+    df = pd.DataFrame(rows, columns=COLUMNS, copy=False)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+    return df
+
+
+def forming_candle(agg, tf):
+    current = agg["frames"][tf]["current"]
+    if current is None:
+        return None
+    return dict(zip(["timestamp", "open", "high", "low", "close", "ticks"], current))
+
+
+def buffer_nbytes(agg):
+    return sum(frame["buffer"].nbytes for frame in agg["frames"].values())
+
+
+# --- Background feed ---
+def start_feed_thread(agg, feed):
+    thread = threading.Thread(target=ingest_feed, args=(agg, feed), daemon=True)
+    thread.start()
+    return thread
+
+
+# --- Benchmark ---
+def bench(feed, capacity=1440):
+    tracemalloc.start()
+    agg = new_aggregator(capacity=capacity)
+    start = time.perf_counter()
+    count = ingest_feed(agg, feed)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Ingested {count:,} ticks in {elapsed:.2f}s = {count / elapsed:,.0f} ticks/sec")
+    print(f"Ring buffers: {buffer_nbytes(agg) / 1024:,.1f} KiB, peak traced memory: {peak / 1024:,.1f} KiB")
+    for tf, frame in agg["frames"].items():
+        print(f"  {tf:>3}: {frame['closed']:,} candles closed, {len(candles_view(agg, tf)):,} buffered")
+    return agg
+
+
+def main(argv=None):
+    from alert_daemon import random_walk_feed, replay_feed
+
+    parser = argparse.ArgumentParser(description="Replay ticks through the candle aggregator")
+    parser.add_argument("ticks", nargs="?", help="CSV of timestamp,price ticks")
+    parser.add_argument("--synthetic", type=int, default=1_000_000, help="Random-walk ticks when no file is given")
+    parser.add_argument("--capacity", type=int, default=1440, help="Candles kept per timeframe")
+    args = parser.parse_args(argv)
+
+    if args.ticks:
+        feed = replay_feed(args.ticks)
+    else:
+        # One tick per second, starting at a round hour
+        feed = ((1_699_999_200 + ts, price) for ts, price in random_walk_feed(args.synthetic, step=0.5))
+    bench(feed, args.capacity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import matplotlib.pyplot as plt
+import mplfinance as mpf
+import numpy as np
+import pandas as pd
+
+# --- Figure and table builders shared by the pages and batch_report.py ---
+# Nothing here calls Streamlit: pages pass the results to st.pyplot / st.dataframe, the
+# batch report saves them to disk.
+
+
+def compute_heikin_ashi(df):
+    ha_df = pd.DataFrame(index=df.index)
+    ha_df["close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
+    ha_open = [(df["open"].iloc[0] + df["close"].iloc[0]) / 2]
+    for i in range(1, len(df)):
+        ha_open.append((ha_open[i - 1] + ha_df["close"].iloc[i - 1]) / 2)
+    ha_df["open"] = ha_open
+    ha_df["high"] = df[["high", "open", "close"]].max(axis=1)
+    ha_df["low"] = df[["low", "open", "close"]].min(axis=1)
+    return ha_df
+
+
+def heikin_ashi_frame(candles):
+    # Live aggregator candles already carry ha_* columns filled in at close; reuse them
+    df = candles.set_index("timestamp")
+    if "ha_open" in df.columns:
+        ha_df = df[["ha_open", "ha_high", "ha_low", "ha_close"]].rename(columns=lambda c: c[len("ha_"):])
+    else:
+        ha_df = compute_heikin_ashi(df)
+    ha_df = ha_df[["open", "high", "low", "close"]].copy()
+    ha_df.index.name = "Date"
+    return ha_df
+
+
+# --- Band charts ---
+def band_figures(row, candles, eth_price=None, ha_df=None):
+    # ha_df: heikin_ashi_frame(candles), precomputed when many bands share the same candles
+    band_label = row["Label"]
+    band_min = row["Min"]
+    band_max = row["Max"]
+    dd_levels = [(level, row[level]) for level in ["Down5", "Down10", "Down15"] if pd.notna(row.get(level))]
+
+    ha_plot_df = ha_df if ha_df is not None else heikin_ashi_frame(candles)
+
+    ap_lines = [
+        mpf.make_addplot([band_min] * len(ha_plot_df), color='orange', linestyle='--'),
+        mpf.make_addplot([band_max] * len(ha_plot_df), color='green', linestyle='--')
+    ]
+    if eth_price:
+        ap_lines.append(mpf.make_addplot([eth_price] * len(ha_plot_df), color='red'))
+
+    fig_mpf, ax_mpf = mpf.plot(
+        ha_plot_df,
+        type='candle',
+        style='charles',
+        ylabel="Price",
+        title=f"{band_label} Range (Heikin-Ashi)",
+        addplot=ap_lines,
+        figsize=(10, 5),
+        returnfig=True
+    )
+
+    if eth_price and band_min <= eth_price <= band_max:
+        ax_mpf[0].axhspan(band_min, band_max, color='green', alpha=0.2)
+
+    fig, ax2 = plt.subplots(figsize=(10, 3))
+    for label, price in dd_levels:
+        ax2.axhline(price, linestyle="--", label=f"{label} = {int(price)}", color="skyblue")
+    ax2.set_title(f"{band_label} Drawdowns")
+    ax2.set_ylabel("Price")
+    ax2.legend()
+    return fig_mpf, fig
+
+
+# --- Liquidation overlay ---
+def heikin_ashi_klines(price_data):
+    klines = price_data.copy()
+    klines['HA_Close'] = (klines['Open'] + klines['High'] + klines['Low'] + klines['Close']) / 4
+    ha_open = [(klines['Open'].iloc[0] + klines['Close'].iloc[0]) / 2]
+    for i in range(1, len(klines)):
+        ha_open.append((ha_open[i - 1] + klines['HA_Close'].iloc[i - 1]) / 2)
+    klines['HA_Open'] = ha_open
+    return klines
+
+
+def flush_scores(clusters, current_price):
+    scores = {}
+    if clusters:
+        max_value = max(clusters.values())
+        for price, value in clusters.items():
+            size_score = value / max_value
+            proximity = abs(price - current_price) / current_price
+            proximity_score = max(0, 1 - proximity * 20)
+            scores[price] = round((size_score * 0.6 + proximity_score * 0.4), 2)
+    return scores
+
+
+def liquidation_overlay_figure(klines, lp_range, clusters):
+    lp_low, lp_high = lp_range
+    current_price = klines['HA_Close'].iloc[-1]
+
+    # Only clusters below the top of the LP range matter
+    filtered_clusters = {p: v for p, v in clusters.items() if p <= lp_high}
+    scores = flush_scores(filtered_clusters, current_price)
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(klines['Open Time'], klines['HA_Close'], label='ETH Price (Heikin Ashi)', color='black')
+    ax.axhspan(lp_low, lp_high, color='green', alpha=0.2, label=f'LP Range {lp_low}–{lp_high}')
+
+    if filtered_clusters:
+        max_value = max(filtered_clusters.values())
+        for level, value in filtered_clusters.items():
+            intensity = min(1.0, value / max_value)
+            score = scores.get(level, 0)
+            ax.axhspan(level - 1, level + 1, color='red', alpha=intensity * 0.4)
+            ax.text(klines['Open Time'].iloc[0], level, f"${value:.1f}M\nScore: {score}", fontsize=8, color='darkred', va='center')
+
+    ax.set_title("ETH Price (Heikin Ashi) with LP Range + Liquidation Zones")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Price")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+# --- Tables ---
+def loop2_table(supplied_eth, borrowed_usd, eth_price, ltvs=range(10, 50)):
+    total_collateral_usd = supplied_eth * eth_price
+    loop2_data = []
+    for ltv2 in ltvs:
+        loan2 = total_collateral_usd * ltv2 / 100
+        total_debt = borrowed_usd + loan2
+        hf = (total_collateral_usd * 0.80) / total_debt if total_debt > 0 else 0
+        liq_price2 = total_debt / (supplied_eth * 0.80) if supplied_eth > 0 else 0
+        pct_to_liq2 = 1 - (liq_price2 / eth_price) if eth_price > 0 else 0
+        loop2_data.append({
+            "LTV (%)": ltv2,
+            "Health Score": round(hf, 2),
+            "Loan Amount ($)": f"${loan2:,.2f}",
+            "Total New Debt ($)": f"${total_debt:,.2f}",
+            "% to Liquidation": f"{pct_to_liq2:.1%}",
+            "ETH Price at Liquidation": f"${liq_price2:,.2f}"
+        })
+    return pd.DataFrame(loop2_data)
+
+
+def lp_exit_scenarios(eth_stack, loop2_debt_usd, fees_earned_eth, scenario_prices):
+    prices = np.asarray(scenario_prices, dtype=float)
+    repayable_eth = loop2_debt_usd / prices
+    return pd.DataFrame({
+        "Scenario Price ($)": prices,
+        "ETH Stack": eth_stack,
+        "Collateral Value ($)": eth_stack * prices,
+        "Loop 2 Debt ($)": loop2_debt_usd,
+        "Debt in ETH": repayable_eth,
+        "Fees Earned (ETH)": fees_earned_eth,
+        "Net ETH After Repay": fees_earned_eth - repayable_eth
+    })
@@ -0,0 +1,91 @@
+import hashlib
+from collections import OrderedDict
+
+import pandas as pd
+
+# --- Dependency-tracked memoization for Streamlit reruns ---
+# A page declares its pipeline as named nodes on every run:
+#
+#   graph = compute_graph.get_graph(st.session_state, "lp_exit")
+#   compute_graph.node(graph, "token_id", parse_token_id, inputs={"lp_url": lp_url})
+#   compute_graph.node(graph, "lp", fetch_lp, deps={"token_id": "token_id"})
+#   lp = compute_graph.evaluate(graph, "lp")
+#
+# A node's cache key is built from its input values and the keys of the nodes it depends on,
+# so after a widget change only the nodes downstream of that widget miss the cache and run
+# again. Node functions get inputs and dependency results as keyword arguments; they must not
+# mutate dependency results or call st.* (their output is not replayed on a cache hit).
+
+DEFAULT_CACHE_SIZE = 64
+
+
+def get_graph(store, name, cache_size=DEFAULT_CACHE_SIZE):
+    key = f"_compute_graph_{name}"
+    if key not in store:
+        store[key] = {
+            "nodes": {},
+            "cache": OrderedDict(),
+            "cache_size": cache_size,
+            "computes": {},
+            "evaluations": {},
+        }
+    graph = store[key]
+    graph["resolved"] = {}  # node -> cache key for this run
+    graph["ran"] = set()  # nodes recomputed during this run
+    return graph
+
+
+def node(graph, name, fn, inputs=None, deps=None):
+    graph["nodes"][name] = (fn, inputs or {}, deps or {})
+    graph["resolved"].pop(name, None)
+
+
+def _freeze(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ("pandas", int(pd.util.hash_pandas_object(value).sum()))
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("repr", hashlib.sha1(repr(value).encode()).hexdigest())
+
+
+def _resolve(graph, name):
+    if name in graph["resolved"]:
+        return graph["resolved"][name]
+
+    fn, inputs, deps = graph["nodes"][name]
+    dep_values = {param: evaluate(graph, dep) for param, dep in deps.items()}
+    dep_keys = tuple((param, graph["resolved"][dep]) for param, dep in sorted(deps.items()))
+    key = (name, tuple((k, _freeze(v)) for k, v in sorted(inputs.items())), dep_keys)
+
+    cache = graph["cache"]
+    if key in cache:
+        cache.move_to_end(key)
+    else:
+        cache[key] = fn(**inputs, **dep_values)
+        graph["computes"][name] = graph["computes"].get(name, 0) + 1
+        graph["ran"].add(name)
+        while len(cache) > graph["cache_size"]:
+            cache.popitem(last=False)
+    graph["evaluations"][name] = graph["evaluations"].get(name, 0) + 1
+    graph["resolved"][name] = key
+    return key
+
+
+def evaluate(graph, name):
+    key = _resolve(graph, name)
+    if key not in graph["cache"]:
+        # Evicted by a later node in this same run; recompute it
+        graph["resolved"].pop(name)
+        key = _resolve(graph, name)
+    return graph["cache"][key]
+
+
+def counts_frame(graph):
+    return pd.DataFrame({
+        "Node": list(graph["nodes"]),
+        "Recomputes": [graph["computes"].get(name, 0) for name in graph["nodes"]],
+        "Evaluations": [graph["evaluations"].get(name, 0) for name in graph["nodes"]],
+        "Ran This Rerun": [name in graph["ran"] for name in graph["nodes"]],
+    })
@@ -1,9 +1,11 @@
 import streamlit as st
-import requests
-import pandas as pd
 import numpy as np
 import yfinance as yf
 import matplotlib.pyplot as plt
+import hf_replay
+import spot_price
+import charts
+import positions
 
 st.set_page_config(
     page_title="Crypto Defi Dashboard",
@@ -15,30 +17,39 @@ st.set_page_config(
 st.markdown("# AAVE Collateral and Lending")
 
 # --- Fetch ETH Price ---
-def fetch_eth_price():
+def fetch_eth_quote():
     try:
-        r = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd")
-        return r.json()["ethereum"]["usd"]
-    except:
-        return 2600.00  # fallback price
+        return spot_price.get_spot_price()
+    except spot_price.PriceUnavailable as e:
+        st.error(f"Could not fetch a live ETH price: {e}")
+        return None
 
-if "eth_price" not in st.session_state:
-    st.session_state.eth_price = fetch_eth_price()
+if st.session_state.get("eth_quote") is None:
+    st.session_state.eth_quote = fetch_eth_quote()
 
-if st.button("Refresh ETH Price from CoinGecko"):
-    st.session_state.eth_price = fetch_eth_price()
+if st.button("Refresh ETH Price"):
+    st.session_state.eth_quote = fetch_eth_quote()
 
 st.header("Step 1: Fetch ETH Price")
 
-eth_price = st.session_state.eth_price
+quote = st.session_state.eth_quote
+if quote is None:
+    st.stop()
+eth_price = quote["price"]
 st.markdown(f"**Real-Time ETH Price:** ${eth_price:,.2f}")
+st.caption(
+    ("Median of " if len(quote["sources"]) > 1 else "From ") + ", ".join(f"{name} ${price:,.2f}" for name, price in quote["sources"].items())
+    + f" · fetched in {quote['elapsed_ms']:.0f} ms{' (hedged)' if quote['hedged'] else ''}"
+    + (f" · source data up to {quote['staleness_s']:.0f}s old" if quote["staleness_s"] is not None
+       else " · source data age unknown")
+)
 
 # --- Manual Override for AAVE Balances ---
 st.header("Step 2: Aave Account Overview")
 
-supplied_eth = 9.41
-borrowed_usd = 6798.58
-health_factor = 2.80
+supplied_eth = positions.SUPPLIED_ETH
+borrowed_usd = positions.BORROWED_USD
+health_factor = positions.HEALTH_FACTOR
 
 # --- Derived Metrics ---
 total_collateral_usd = supplied_eth * eth_price
@@ -92,21 +103,38 @@ st.pyplot(fig)
 
 # --- Loop 2 Simulation ---
 st.header("Step 3: Loop 2 Evaluation")
-loop2_data = []
-for ltv2 in range(10, 50):
-    loan2 = total_collateral_usd * ltv2 / 100
-    total_debt = borrowed_usd + loan2
-    hf = (total_collateral_usd * 0.80) / total_debt if total_debt > 0 else 0
-    liq_price2 = total_debt / (supplied_eth * 0.80) if supplied_eth > 0 else 0
-    pct_to_liq2 = 1 - (liq_price2 / eth_price) if eth_price > 0 else 0
-    loop2_data.append({
-        "LTV (%)": ltv2,
-        "Health Score": round(hf, 2),
-        "Loan Amount ($)": f"${loan2:,.2f}",
-        "Total New Debt ($)": f"${total_debt:,.2f}",
-        "% to Liquidation": f"{pct_to_liq2:.1%}",
-        "ETH Price at Liquidation": f"${liq_price2:,.2f}"
-    })
-
-df = pd.DataFrame(loop2_data)
+df = charts.loop2_table(supplied_eth, borrowed_usd, eth_price)
 st.dataframe(df, use_container_width=True)
+
+# --- Historical Stress Replay ---
+st.header("Historical Stress Replay")
+
+@st.cache_data(ttl=3600)
+def load_hourly_history():
+    return hf_replay.load_history()
+
+history = load_hourly_history()
+if history.empty:
+    st.error("Failed to load hourly ETH history.")
+else:
+    st.caption(
+        f"{len(history):,} hourly closes from {history.index[0]:%Y-%m-%d} to {history.index[-1]:%Y-%m-%d} "
+        f"(version {hf_replay.history_version(history)})"
+    )
+    st.subheader("Worst Drawdown Windows")
+    st.dataframe(hf_replay.drawdown_windows(history), use_container_width=True)
+
+    hf_thresholds = st.multiselect(
+        "Health factor thresholds",
+        [1.0, 1.05, 1.1, 1.2, 1.3, 1.5, 1.75, 2.0],
+        default=list(hf_replay.HF_THRESHOLDS),
+        help="Each threshold adds a column with how often the HF would have dipped below it."
+    )
+    positions = hf_replay.loop2_positions(supplied_eth, borrowed_usd, eth_price)
+    stress = hf_replay.stress_replay(history, positions, eth_price, thresholds=tuple(sorted(hf_thresholds)))
+    st.subheader("Health Factor Through History")
+    st.caption(
+        "Held: today's position held through the whole history. "
+        "Worst / % Entries: the position opened at today's HF at any past hour and held for the window."
+    )
+    st.dataframe(stress.round(2), use_container_width=True)
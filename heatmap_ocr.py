@@ -0,0 +1,248 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageStat
+import pytesseract
+
+# --- Liquidation heatmap OCR ingestion ---
+# Screenshots are hashed in the parent process; only images without a cached result are
+# preprocessed and run through Tesseract, spread over a process pool. Each image yields
+# (price, $M) clusters in the same {price: $M} shape as the overlay's manual cluster input.
+# The Tesseract binary is checked once in the parent, and a worker that fails on one image
+# reports the error instead of raising, so one bad screenshot can't break the whole pool.
+#
+#   python heatmap_ocr.py shot1.png shot2.png
+#   python heatmap_ocr.py --synthetic 40 --workers 4
+
+CACHE_DIR = "data/ocr_cache"
+CLUSTERS_CSV = "data/clusters.csv"  # the overlay page's current clusters, read by batch_report.py
+TESSERACT_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789.,$MKmk:"
+PRICE_RANGE = (100, 100_000)
+
+AMOUNT_RE = re.compile(r"\$?\s*(\d+(?:[.,]\d+)?)\s*([MK])\b", re.IGNORECASE)
+NUMBER_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?")
+
+
+class OCRFailed(Exception):
+    def __init__(self, errors):
+        # errors: {image digest: message} for the images that could not be read
+        super().__init__(f"{len(errors)} image(s) could not be read: " + "; ".join(errors.values()))
+        self.errors = errors
+
+
+def image_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# --- Worker side ---
+def preprocess(image):
+    # Heatmaps are light text on a dark background: grayscale, invert if dark, upscale, binarize
+    gray = ImageOps.grayscale(image)
+    if ImageStat.Stat(gray).mean[0] < 128:
+        gray = ImageOps.invert(gray)
+    gray = ImageOps.autocontrast(gray)
+    gray = gray.resize((gray.width * 2, gray.height * 2), Image.LANCZOS)
+    return gray.point(lambda p: 255 if p > 160 else 0)
+
+
+def parse_clusters(text):
+    clusters = []
+    for line in text.splitlines():
+        amount = AMOUNT_RE.search(line)
+        if not amount:
+            continue
+        value_m = float(amount.group(1).replace(",", "."))
+        if amount.group(2).upper() == "K":
+            value_m /= 1000
+        rest = line[:amount.start()] + " " + line[amount.end():]
+        for token in NUMBER_RE.findall(rest):
+            price = float(token.replace(",", ""))
+            if PRICE_RANGE[0] <= price <= PRICE_RANGE[1]:
+                clusters.append((price, value_m))
+                break
+    return clusters
+
+
+def ocr_image(data):
+    image = preprocess(Image.open(io.BytesIO(data)))
+    text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+    return parse_clusters(text)
+
+
+def _ocr_worker(item):
+    # Errors come back as a plain string: exceptions raised here would have to unpickle in the parent
+    digest, data = item
+    try:
+        return digest, ocr_image(data), None
+    except Exception as e:
+        return digest, None, f"{type(e).__name__}: {e}"
+
+
+# --- Parent side ---
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def _pool_context():
+    # Forking a multithreaded parent (the Streamlit server) can deadlock the children
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _load_cached(digest, cache_dir):
+    try:
+        with open(_cache_path(digest, cache_dir)) as f:
+            return [tuple(c) for c in json.load(f)]
+    except FileNotFoundError:
+        return None
+
+
+def extract_batch(images, workers=None, cache_dir=CACHE_DIR):
+    # Returns one cluster list per input image, in input order. Raises TesseractNotFoundError
+    # before any work starts, and OCRFailed after caching every image that did succeed.
+    os.makedirs(cache_dir, exist_ok=True)
+    digests = [image_hash(data) for data in images]
+    results = {}
+    todo = {}
+    for digest, data in zip(digests, images):
+        if digest in results or digest in todo:
+            continue
+        cached = _load_cached(digest, cache_dir)
+        if cached is None:
+            todo[digest] = data
+        else:
+            results[digest] = cached
+
+    errors = {}
+    if todo:
+        pytesseract.get_tesseract_version()
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(todo) == 1:
+            done = list(map(_ocr_worker, todo.items()))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(todo)), mp_context=_pool_context()) as pool:
+                chunksize = max(1, len(todo) // (workers * 4))
+                done = list(pool.map(_ocr_worker, todo.items(), chunksize=chunksize))
+        for digest, clusters, error in done:
+            if error is not None:
+                errors[digest] = error
+                continue
+            results[digest] = clusters
+            with open(_cache_path(digest, cache_dir), "w") as f:
+                json.dump(clusters, f)
+
+    if errors:
+        raise OCRFailed(errors)
+    return [results[digest] for digest in digests]
+
+
+def merge_clusters(cluster_lists):
+    # Same {int price: $M rounded to 0.1} shape as st.session_state.custom_clusters;
+    # a level seen in several screenshots keeps its largest size
+    merged = {}
+    for clusters in cluster_lists:
+        for price, value_m in clusters:
+            key = int(round(price))
+            merged[key] = max(merged.get(key, 0), round(value_m, 1))
+    return merged
+
+
+def ingest_batch(images, workers=None, cache_dir=CACHE_DIR):
+    return merge_clusters(extract_batch(images, workers, cache_dir))
+
+
+def load_clusters(path=CLUSTERS_CSV):
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline="") as f:
+        return {int(float(row["price"])): float(row["value_m"]) for row in csv.DictReader(f)}
+
+
+def save_clusters(clusters, path=CLUSTERS_CSV):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["price", "value_m"])
+        writer.writerows(sorted(clusters.items()))
+    os.replace(tmp_path, path)
+
+
+# --- Synthetic benchmark ---
+def synthetic_heatmap(clusters, size=(900, 600), seed=0):
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (20, 16, 40))
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle([x, y, x + rng.randrange(20, 120), y + 4], fill=(rng.randrange(60, 120), 40, 90))
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 22)
+    except OSError:
+        font = ImageFont.load_default()
+    for i, (price, value_m) in enumerate(clusters):
+        draw.text((30, 30 + i * 40), f"{price:,.0f}   ${value_m:.1f}M", fill=(240, 240, 240), font=font)
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def bench(n_images, workers, cache_dir):
+    rng = random.Random(42)
+    truth, images = [], []
+    for i in range(n_images):
+        clusters = [(rng.randrange(1800, 3200), round(rng.uniform(1, 60), 1)) for _ in range(rng.randrange(3, 10))]
+        truth.append(clusters)
+        images.append(synthetic_heatmap(clusters, seed=i))
+
+    start = time.perf_counter()
+    extracted = extract_batch(images, workers, cache_dir)
+    elapsed = time.perf_counter() - start
+
+    found = sum(len(set(t) & set(e)) for t, e in zip(truth, extracted))
+    total = sum(len(t) for t in truth)
+    print(f"{n_images} images in {elapsed:.2f}s with {workers or os.cpu_count()} workers "
+          f"= {n_images / elapsed:.1f} images/sec")
+    print(f"Recovered {found}/{total} clusters exactly")
+
+    start = time.perf_counter()
+    extract_batch(images, workers, cache_dir)
+    print(f"Cached rerun: {time.perf_counter() - start:.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract liquidation clusters from heatmap screenshots")
+    parser.add_argument("images", nargs="*", help="Screenshot files")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--synthetic", type=int, help="Benchmark on this many generated heatmaps")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.synthetic:
+            import tempfile
+            with tempfile.TemporaryDirectory() as cache_dir:
+                bench(args.synthetic, args.workers, cache_dir)
+            return
+
+        images = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                images.append(f.read())
+        for price, value_m in sorted(ingest_batch(images, args.workers, args.cache_dir).items()):
+            print(f"{price}\t{value_m}")
+    except (pytesseract.TesseractNotFoundError, OCRFailed) as e:
+        raise SystemExit(f"OCR failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
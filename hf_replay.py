@@ -0,0 +1,116 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# --- Historical health-factor stress replay ---
+# With fixed ETH collateral and fixed USD debt, HF(t) = supplied_eth * price(t) * LT / debt,
+# i.e. every position's HF path is the price path scaled by one constant. That lets the whole
+# Loop 2 grid be replayed in one pass:
+#   - held through history: min HF and hours below each threshold come from the sorted prices
+#   - entered at any hour:  the worst HF within a window is entry HF * min(forward rolling-min / price)
+# Results are cached per history version (a hash of the price series).
+
+LIQ_THRESHOLD = 0.80
+WINDOWS = {"24h": 24, "7d": 24 * 7, "30d": 24 * 30}
+HF_THRESHOLDS = (1.0, 1.2, 1.5)
+
+_cache = {}
+CACHE_SIZE = 32
+
+
+def load_history(period="730d", interval="1h"):
+    # Yahoo serves hourly bars for roughly the last two years
+    import yfinance as yf
+    df = yf.download("ETH-USD", period=period, interval=interval, progress=False)
+    price_col = 'Adj Close' if 'Adj Close' in df.columns else 'Close'
+    prices = df[price_col]
+    if isinstance(prices, pd.DataFrame):
+        prices = prices.iloc[:, 0]
+    return prices.dropna().astype(float)
+
+
+def history_version(prices):
+    digest = hashlib.sha1(pd.util.hash_pandas_object(prices, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def loop2_positions(supplied_eth, borrowed_usd, eth_price, ltvs=range(10, 50)):
+    # Same grid as Step 3 of crypto-defi-dashboard.py, with Loop 1 alone as the first row
+    collateral_usd = supplied_eth * eth_price
+    rows = [{"Position": "Loop 1", "LTV (%)": 0, "supplied_eth": supplied_eth, "debt_usd": borrowed_usd}]
+    for ltv2 in ltvs:
+        rows.append({
+            "Position": f"Loop 2 @ {ltv2}%",
+            "LTV (%)": ltv2,
+            "supplied_eth": supplied_eth,
+            "debt_usd": borrowed_usd + collateral_usd * ltv2 / 100,
+        })
+    return pd.DataFrame(rows)
+
+
+def _forward_min_ratio(prices, hours):
+    # min(price[t:t + hours]) / price[t] for every start hour t
+    fwd_min = prices[::-1].rolling(hours, min_periods=1).min()[::-1]
+    return (fwd_min / prices).to_numpy()
+
+
+def drawdown_windows(prices, windows=WINDOWS):
+    rows = []
+    values = prices.to_numpy()
+    for name, hours in windows.items():
+        ratio = _forward_min_ratio(prices, hours)
+        start = int(np.argmin(ratio))
+        end = start + int(np.argmin(values[start:start + hours]))
+        rows.append({
+            "Window": name,
+            "Start": prices.index[start],
+            "Low At": prices.index[end],
+            "Start Price ($)": values[start],
+            "Low Price ($)": values[end],
+            "Drawdown (%)": (ratio[start] - 1) * 100,
+        })
+    return pd.DataFrame(rows)
+
+
+def stress_replay(prices, positions, eth_price, windows=WINDOWS, thresholds=HF_THRESHOLDS, liq_threshold=LIQ_THRESHOLD):
+    key = (
+        history_version(prices),
+        pd.util.hash_pandas_object(positions[["supplied_eth", "debt_usd"]], index=False).sum(),
+        float(eth_price),
+        tuple(windows.items()),
+        tuple(thresholds),
+        liq_threshold,
+    )
+    if key in _cache:
+        return _cache[key]
+
+    supplied = positions["supplied_eth"].to_numpy(dtype=float)
+    debt = positions["debt_usd"].to_numpy(dtype=float)
+    liq_price = debt / (supplied * liq_threshold)
+    entry_hf = eth_price / liq_price
+    sorted_prices = np.sort(prices.to_numpy())
+
+    result = pd.DataFrame({
+        "Position": positions["Position"],
+        "Entry HF": entry_hf,
+        "Liquidation Price ($)": liq_price,
+        "Min HF (held)": sorted_prices[0] / liq_price,
+    })
+    for t in thresholds:
+        # HF < t  <=>  price < t * liq_price
+        result[f"Hours HF<{t:g} (held)"] = np.searchsorted(sorted_prices, t * liq_price, side="left")
+
+    for name, hours in windows.items():
+        ratio = _forward_min_ratio(prices, hours)
+        sorted_ratio = np.sort(ratio)
+        result[f"Worst HF {name}"] = entry_hf * sorted_ratio[0]
+        for t in thresholds:
+            # Entered at HF0, the window dips below t when ratio < t / HF0
+            below = np.searchsorted(sorted_ratio, t / entry_hf, side="left")
+            result[f"% Entries HF<{t:g} in {name}"] = below / len(sorted_ratio) * 100
+
+    if len(_cache) >= CACHE_SIZE:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = result
+    return result
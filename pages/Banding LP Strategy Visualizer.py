@@ -3,23 +3,21 @@ import requests
 import pandas as pd
 import matplotlib.pyplot as plt
 import mplfinance as mpf
+import spot_price
+from charts import compute_heikin_ashi
 from datetime import datetime
 
 st.set_page_config(layout="wide")
 st.title("ETH Liquidity Band Dashboard")
 
 # -- Constants --
-DEXSCREENER_API = "https://api.dexscreener.com/latest/dex/pairs/ethereum/0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"
 COINGECKO_API = "https://api.coingecko.com/api/v3/coins/ethereum/ohlc?vs_currency=usd&days=1"
 
 @st.cache_data(ttl=60)
 def fetch_eth_spot():
     try:
-        r = requests.get(DEXSCREENER_API)
-        r.raise_for_status()
-        data = r.json()
-        return float(data["pair"]["priceUsd"])
-    except:
+        return spot_price.get_spot_price()["price"]
+    except spot_price.PriceUnavailable:
         return None
 
 @st.cache_data(ttl=300)
@@ -34,17 +32,6 @@ def fetch_eth_candles():
     except:
         return None
 
-def compute_heikin_ashi(df):
-    ha_df = pd.DataFrame(index=df.index)
-    ha_df["close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
-    ha_open = [(df["open"].iloc[0] + df["close"].iloc[0]) / 2]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[i - 1] + ha_df["close"].iloc[i - 1]) / 2)
-    ha_df["open"] = ha_open
-    ha_df["high"] = df[["high", "open", "close"]].max(axis=1)
-    ha_df["low"] = df[["low", "open", "close"]].min(axis=1)
-    return ha_df
-
 st.subheader("1. Refresh ETH Price")
 col1, col2 = st.columns([2, 2])
 
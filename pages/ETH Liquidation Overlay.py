@@ -1,9 +1,9 @@
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
-import numpy as np
 import requests
 import time
+import heatmap_ocr
+import charts
 
 st.set_page_config(layout="wide")
 
@@ -23,7 +23,7 @@ if "price_data" not in st.session_state:
     st.session_state.price_data = get_coingecko_ohlc()
     st.session_state.last_refresh = time.time()
 if "custom_clusters" not in st.session_state:
-    st.session_state.custom_clusters = {}
+    st.session_state.custom_clusters = heatmap_ocr.load_clusters()
 if "lp_range" not in st.session_state:
     st.session_state.lp_range = (2500, 2600)
 
@@ -39,14 +39,7 @@ with col1:
     st.caption(f"⏱️ Last refreshed {elapsed} seconds ago")
 
 # Data prep
-klines = st.session_state.price_data.copy()
-klines['HA_Close'] = (klines['Open'] + klines['High'] + klines['Low'] + klines['Close']) / 4
-ha_open = [(klines['Open'][0] + klines['Close'][0]) / 2]
-for i in range(1, len(klines)):
-    ha_open.append((ha_open[i - 1] + klines['HA_Close'][i - 1]) / 2)
-klines['HA_Open'] = ha_open
-
-current_price = klines['HA_Close'].iloc[-1]
+klines = charts.heikin_ashi_klines(st.session_state.price_data)
 
 # Manual LP range
 with st.sidebar.expander("📘 LP Range Input", expanded=True):
@@ -63,6 +56,22 @@ with st.sidebar.expander("🔥 Add Liquidation Clusters", expanded=True):
     value = st.number_input("Cluster $M", step=0.1)
     if st.button("Add Cluster"):
         st.session_state.custom_clusters[int(price)] = round(value, 1)
+        heatmap_ocr.save_clusters(st.session_state.custom_clusters)
+
+# Bulk import clusters from heatmap screenshots
+with st.sidebar.expander("📷 Import Heatmap Screenshots"):
+    shots = st.file_uploader("Heatmap screenshots", type=["png", "jpg", "jpeg"], accept_multiple_files=True)
+    if st.button("Extract Clusters") and shots:
+        try:
+            start = time.time()
+            extracted = heatmap_ocr.ingest_batch([shot.getvalue() for shot in shots])
+            st.session_state.custom_clusters.update(extracted)
+            heatmap_ocr.save_clusters(st.session_state.custom_clusters)
+            st.success(f"Added {len(extracted)} clusters from {len(shots)} images in {time.time() - start:.1f}s")
+        except heatmap_ocr.pytesseract.TesseractNotFoundError:
+            st.error("Tesseract is not installed (see packages.txt).")
+        except heatmap_ocr.OCRFailed as e:
+            st.error(f"Failed to read heatmap screenshots: {e}")
 
 # Delete cluster(s)
 if st.session_state.custom_clusters:
@@ -71,42 +80,8 @@ if st.session_state.custom_clusters:
         if st.button("Remove Selected"):
             for p in to_delete:
                 st.session_state.custom_clusters.pop(p, None)
-
-# Filter clusters below LP range
-filtered_clusters = {p: v for p, v in st.session_state.custom_clusters.items() if p <= st.session_state.lp_range[1]}
-
-# Flush score logic
-flush_scores = {}
-if filtered_clusters:
-    max_value = max(filtered_clusters.values())
-    for price, value in filtered_clusters.items():
-        size_score = value / max_value
-        proximity = abs(price - current_price) / current_price
-        proximity_score = max(0, 1 - proximity * 20)
-        flush_score = round((size_score * 0.6 + proximity_score * 0.4), 2)
-        flush_scores[price] = flush_score
+            heatmap_ocr.save_clusters(st.session_state.custom_clusters)
 
 # Plot
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.plot(klines['Open Time'], klines['HA_Close'], label='ETH Price (Heikin Ashi)', color='black')
-
-# LP Range
-lp_low, lp_high = st.session_state.lp_range
-ax.axhspan(lp_low, lp_high, color='green', alpha=0.2, label=f'LP Range {lp_low}–{lp_high}')
-
-# Liquidation zones
-if filtered_clusters:
-    max_value = max(filtered_clusters.values())
-    for level, value in filtered_clusters.items():
-        intensity = min(1.0, value / max_value)
-        score = flush_scores.get(level, 0)
-        ax.axhspan(level - 1, level + 1, color='red', alpha=intensity * 0.4)
-        ax.text(klines['Open Time'].iloc[0], level, f"${value:.1f}M\nScore: {score}", fontsize=8, color='darkred', va='center')
-
-# Final touches
-ax.set_title("ETH Price (Heikin Ashi) with LP Range + Liquidation Zones")
-ax.set_xlabel("Time")
-ax.set_ylabel("Price")
-ax.legend()
-ax.grid(True)
+fig = charts.liquidation_overlay_figure(klines, st.session_state.lp_range, st.session_state.custom_clusters)
 st.pyplot(fig)
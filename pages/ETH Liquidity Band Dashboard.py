@@ -1,29 +1,29 @@
 import streamlit as st
 import requests
 import pandas as pd
-import matplotlib.pyplot as plt
-import mplfinance as mpf
+import spot_price
 from datetime import datetime
 import gspread
 from google.oauth2.service_account import Credentials
 import json
 import traceback
+import band_history
+import band_events
+import candles
+import alert_daemon
+import charts
 
 st.set_page_config(layout="wide")
 st.title("ETH Liquidity Band Dashboard (Auto Mode Enabled)")
 
 # -- Constants --
-DEXSCREENER_API = "https://api.dexscreener.com/latest/dex/pairs/ethereum/0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640"
 COINGECKO_API = "https://api.coingecko.com/api/v3/coins/ethereum/ohlc?vs_currency=usd&days=1"
 
 @st.cache_data(ttl=60)
 def fetch_eth_spot():
     try:
-        r = requests.get(DEXSCREENER_API)
-        r.raise_for_status()
-        data = r.json()
-        return float(data["pair"]["priceUsd"])
-    except:
+        return spot_price.get_spot_price()["price"]
+    except spot_price.PriceUnavailable:
         return None
 
 @st.cache_data(ttl=300)
@@ -38,16 +38,21 @@ def fetch_eth_candles():
     except:
         return None
 
-def compute_heikin_ashi(df):
-    ha_df = pd.DataFrame(index=df.index)
-    ha_df["close"] = (df["open"] + df["high"] + df["low"] + df["close"]) / 4
-    ha_open = [(df["open"].iloc[0] + df["close"].iloc[0]) / 2]
-    for i in range(1, len(df)):
-        ha_open.append((ha_open[i - 1] + ha_df["close"].iloc[i - 1]) / 2)
-    ha_df["open"] = ha_open
-    ha_df["high"] = df[["high", "open", "close"]].max(axis=1)
-    ha_df["low"] = df[["low", "open", "close"]].min(axis=1)
-    return ha_df
+@st.cache_resource
+def live_candle_aggregator():
+    agg = candles.new_aggregator()
+    candles.start_feed_thread(agg, alert_daemon.live_feed(interval=5))
+    return agg
+
+def get_candles():
+    source = st.session_state.get("candle_source", "CoinGecko OHLC")
+    if source == "CoinGecko OHLC":
+        return fetch_eth_candles()
+    df = candles.candles_frame(live_candle_aggregator(), source.split()[-1])
+    if df.empty:
+        return None
+    # Keep the ha_* columns: charts.band_figures plots them instead of recomputing Heikin-Ashi
+    return df
 
 def load_google_sheet_text(sheet_id, tab_name="BandingLiveTest", cell_range="B14:B17"):
     scope = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
@@ -65,123 +70,70 @@ def load_google_sheet_text(sheet_id, tab_name="BandingLiveTest", cell_range="B14
 def load_csv():
     return pd.read_csv("data/bands.csv")
 
-def render_chart_from_row(row, eth_price=None):
-    band_label = row["Label"]
-    band_min = row["Min"]
-    band_max = row["Max"]
-    band_mid = (band_min + band_max) / 2
-    dd_levels = [(level, row[level]) for level in ["Down5", "Down10", "Down15"]]
-
-    df = fetch_eth_candles()
-    df.set_index("timestamp", inplace=True)
-    ha_df = compute_heikin_ashi(df)
-    ha_plot_df = ha_df[["open", "high", "low", "close"]].copy()
-    ha_plot_df.index.name = "Date"
-
-    ap_lines = [
-        mpf.make_addplot([band_min] * len(ha_plot_df), color='orange', linestyle='--'),
-        mpf.make_addplot([band_max] * len(ha_plot_df), color='green', linestyle='--')
-    ]
-    if eth_price:
-        ap_lines.append(mpf.make_addplot([eth_price] * len(ha_plot_df), color='red'))
-
-    fig_mpf, ax_mpf = mpf.plot(
-        ha_plot_df,
-        type='candle',
-        style='charles',
-        ylabel="Price",
-        title=f"{band_label} Range (Heikin-Ashi)",
-        addplot=ap_lines,
-        figsize=(10, 5),
-        returnfig=True
-    )
+def record_band_history(df_bands, source):
+    try:
+        band_history.record_bands(df_bands, source)
+    except Exception as e:
+        st.warning(f"Failed to record band history: {e}")
 
-    if eth_price and band_min <= eth_price <= band_max:
-        ax_mpf[0].axhspan(band_min, band_max, color='green', alpha=0.2)
+def record_band_text_history(input_text, source):
+    try:
+        record_band_history([band_history.parse_band_text(input_text)], source)
+    except ValueError:
+        pass  # unparseable paste; render_charts reports the error
 
+def render_chart_from_row(row, eth_price=None):
+    df = get_candles()
+    if df is None:
+        st.error("No candle data available yet.")
+        return
+    fig_mpf, fig = charts.band_figures(row, df, eth_price)
     st.pyplot(fig_mpf)
-
-    fig, ax2 = plt.subplots(figsize=(10, 3))
-    for label, price in dd_levels:
-        ax2.axhline(price, linestyle="--", label=f"{label} = {int(price)}", color="skyblue")
-    ax2.set_title(f"{band_label} Drawdowns")
-    ax2.set_ylabel("Price")
-    ax2.legend()
     st.pyplot(fig)
 
+def render_band_events(df_bands):
+    df = get_candles()
+    if df is None or df_bands.empty:
+        return
+    events = band_events.crossing_events(df, df_bands)
+    stats = band_events.band_stats(df, df_bands, events)
+    with st.expander(f"📈 Band Crossing Events ({len(events)})", expanded=False):
+        st.dataframe(stats, use_container_width=True)
+        st.dataframe(events.sort_values("timestamp", ascending=False), use_container_width=True)
+
 def render_charts(input_text):
-    lines = input_text.strip().split("\n")
-    band_line = lines[0]
-    dd_lines = lines[1:]
     try:
-        parts = {}
-        band_label = band_line.split("|")[0].strip() if "|" in band_line else "Band"
-        for kv in band_line.split("|"):
-            if "=" in kv:
-                key, val = kv.split("=")
-                key = key.strip()
-                val = val.strip().replace("%", "")
-                parts[key] = float(val)
-        band_min = parts["Min"]
-        band_max = parts["Max"]
-        band_mid = (band_min + band_max) / 2
-        dd_levels = []
-        for line in dd_lines:
-            for kv in line.split("|"):
-                if "Down" in kv and "=" in kv:
-                    label, val = kv.split("=")
-                    dd_levels.append((label.strip(), float(val.strip())))
-                    break
-
-        df = fetch_eth_candles()
-        df.set_index("timestamp", inplace=True)
-        ha_df = compute_heikin_ashi(df)
-        ha_plot_df = ha_df[["open", "high", "low", "close"]].copy()
-        ha_plot_df.index.name = "Date"
-
-        ap_lines = [
-            mpf.make_addplot([band_min] * len(ha_plot_df), color='orange', linestyle='--'),
-            mpf.make_addplot([band_max] * len(ha_plot_df), color='green', linestyle='--')
-        ]
-
-        fig_mpf, ax_mpf = mpf.plot(
-            ha_plot_df,
-            type='candle',
-            style='charles',
-            ylabel="Price",
-            title=f"{band_label} Range (Heikin-Ashi)",
-            addplot=ap_lines,
-            figsize=(10, 5),
-            returnfig=True
-        )
-
-        ax_mpf[0].text(
+        row = band_history.parse_band_text(input_text)
+        df = get_candles()
+        if df is None:
+            st.error("No candle data available yet.")
+            return
+        fig_mpf, fig = charts.band_figures(row, df)
+        fig_mpf.axes[0].text(
             0.5,
-            band_mid,
-            band_line.strip(),
-            transform=ax_mpf[0].get_yaxis_transform(),
+            (row["Min"] + row["Max"]) / 2,
+            input_text.strip().split("\n")[0].strip(),
+            transform=fig_mpf.axes[0].get_yaxis_transform(),
             ha="center",
             va="center",
             color="red",
             fontsize=10,
             bbox=dict(facecolor='white', edgecolor='none', alpha=0.7)
         )
-
         st.pyplot(fig_mpf)
-
-        fig, ax2 = plt.subplots(figsize=(10, 3))
-        for label, price in dd_levels:
-            ax2.axhline(price, linestyle="--", label=f"{label} = {int(price)}", color="skyblue")
-        ax2.set_title(f"{band_label} Drawdowns")
-        ax2.set_ylabel("Price")
-        ax2.legend()
         st.pyplot(fig)
 
     except Exception as e:
         st.error(f"Failed to parse data or generate chart: {e}")
 
 # ---- MAIN LOGIC ----
-mode = st.radio("Data Source Mode", ["Manual", "From Google Sheet", "From CSV"])
+mode = st.radio("Data Source Mode", ["Manual", "From Google Sheet", "From CSV", "From History"])
+st.selectbox(
+    "Candle Source",
+    ["CoinGecko OHLC", "Live 1m", "Live 5m", "Live 15m", "Live 1h"],
+    key="candle_source",
+    help="Live candles are built in-process from spot price ticks and fill in while the app runs."
+)
 auto_refresh = st.checkbox("Auto-refresh ETH price every 30 sec")
 if auto_refresh:
     st.experimental_rerun()
@@ -189,6 +141,10 @@ if auto_refresh:
 eth_price = st.session_state.get("eth_price", fetch_eth_spot())
 if eth_price:
     st.markdown(f"**Latest ETH Price:** ${eth_price:,.2f}")
+    try:
+        band_history.record_spot(eth_price, "spot_median")
+    except Exception as e:
+        st.warning(f"Failed to record ETH price history: {e}")
 else:
     st.error("Failed to fetch ETH price data.")
 
@@ -198,6 +154,7 @@ if mode == "Manual":
     if st.button("Submit Band Info") and band_input:
         st.session_state.band_input = band_input.strip()
     if "band_input" in st.session_state:
+        record_band_text_history(st.session_state["band_input"], "manual")
         render_charts(st.session_state["band_input"])
 
 elif mode == "From Google Sheet":
@@ -220,6 +177,7 @@ elif mode == "From Google Sheet":
         band_text = "\n".join(lines)
         st.text_area("Band Data Pulled from Sheet", band_text, height=150)
         if band_text:
+            record_band_text_history(band_text, f"sheet:{band_option}")
             render_charts(band_text)
     except Exception as e:
         st.error(f"Failed to load sheet: {e}")
@@ -233,5 +191,32 @@ elif mode == "From Google Sheet":
 elif mode == "From CSV":
     df_bands = load_csv()
     if not df_bands.empty:
+        record_band_history(df_bands, "csv")
+        render_band_events(df_bands)
         for _, row in df_bands.iterrows():
             render_chart_from_row(row, eth_price)
+
+elif mode == "From History":
+    st.subheader("Band History")
+    day = st.date_input("Day (UTC)", value=datetime.utcnow().date())
+    day_start = pd.Timestamp(day, tz="UTC")
+    day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(milliseconds=1)
+    df_day = band_history.load_bands(day_start, day_end)
+    if df_day.empty:
+        st.info("No band definitions were recorded on this day.")
+    else:
+        snapshots = sorted(df_day["ts"].unique(), reverse=True)
+        snapshot = st.selectbox(
+            "Snapshot",
+            snapshots,
+            format_func=lambda ts: pd.Timestamp(ts).strftime("%Y-%m-%d %H:%M:%S UTC")
+        )
+        df_spot = band_history.load_spot(day_start, snapshot)
+        snapshot_price = df_spot["price"].iloc[-1] if not df_spot.empty else None
+        if snapshot_price:
+            st.markdown(f"**ETH Price at Snapshot:** ${snapshot_price:,.2f}")
+        df_snapshot = df_day[df_day["ts"] == snapshot].reset_index(drop=True)
+        render_band_events(df_snapshot)
+        for _, row in df_snapshot.iterrows():
+            st.caption(f"Source: {row['source']} · recorded {row['ts']:%Y-%m-%d %H:%M:%S}")
+            render_chart_from_row(row, snapshot_price)
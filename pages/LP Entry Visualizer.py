@@ -5,6 +5,7 @@ import numpy as np
 import requests
 import pytz
 from datetime import datetime
+import compute_graph
 
 st.set_page_config(page_title="LP Entry Visualizer", layout="wide")
 st.title("LP Entry Trigger & Range Visualizer")
@@ -30,30 +31,66 @@ raw_data = fetch_eth_usd_ohlc(days=7)
 if not raw_data:
     st.stop()
 
-df = pd.DataFrame(raw_data, columns=["timestamp", "open", "high", "low", "close"])
-la_tz = pytz.timezone("America/Los_Angeles")
-df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms").dt.tz_localize("UTC").dt.tz_convert(la_tz)
-df = df.drop(columns=["timestamp"])
-df["volume"] = np.random.randint(100, 500, len(df))  # Simulated volume
-
-# === LP Logic ===
-avg_volume = df['volume'].rolling(vol_window).mean()
-df['is_bullish'] = df['close'] > df['open']
-df['body_pct'] = abs(df['close'] - df['open']) / df['low'] * 100
-df['is_big_body'] = df['body_pct'] >= body_threshold
-df['is_high_volume'] = df['volume'] > avg_volume
-
-df['is_local_high'] = (df['high'] > df['high'].shift(1)) & (df['high'] > df['high'].shift(2))
-df['impulse'] = df['is_bullish'] & df['is_big_body'] & df['is_high_volume'] & df['is_local_high']
-df['impulse_close'] = np.where(df['impulse'], df['close'], np.nan)
-df['impulse_close'] = df['impulse_close'].ffill()
-df['entry_price'] = df['impulse_close'] * (1 - entry_drawdown_pct / 100)
-df['entry_trigger'] = df['close'] <= df['entry_price']
-df['lp_lower'] = np.where(df['entry_trigger'], df['entry_price'], np.nan)
-df['lp_upper'] = np.where(df['entry_trigger'], df['impulse_close'] * range_multiplier, np.nan)
-df['lp_lower'] = df['lp_lower'].ffill()
-df['lp_upper'] = df['lp_upper'].ffill()
-df['in_range'] = (df['close'] >= df['lp_lower']) & (df['close'] <= df['lp_upper'])
+# === LP Logic (each signal is a graph node, recomputed only when its inputs change) ===
+def build_frame(raw_data):
+    df = pd.DataFrame(raw_data, columns=["timestamp", "open", "high", "low", "close"])
+    la_tz = pytz.timezone("America/Los_Angeles")
+    df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms").dt.tz_localize("UTC").dt.tz_convert(la_tz)
+    df = df.drop(columns=["timestamp"])
+    df["volume"] = np.random.randint(100, 500, len(df))  # Simulated volume
+    return df
+
+def candle_body(df):
+    return pd.DataFrame({
+        'is_bullish': df['close'] > df['open'],
+        'body_pct': abs(df['close'] - df['open']) / df['low'] * 100,
+        'is_local_high': (df['high'] > df['high'].shift(1)) & (df['high'] > df['high'].shift(2)),
+    })
+
+def big_body(body, body_threshold):
+    return body['body_pct'] >= body_threshold
+
+def high_volume(df, vol_window):
+    return df['volume'] > df['volume'].rolling(vol_window).mean()
+
+def impulse_signals(df, body, is_big_body, is_high_volume):
+    impulse = body['is_bullish'] & is_big_body & is_high_volume & body['is_local_high']
+    impulse_close = pd.Series(np.where(impulse, df['close'], np.nan), index=df.index).ffill()
+    return pd.DataFrame({'impulse': impulse, 'impulse_close': impulse_close})
+
+def lp_range(df, impulses, entry_drawdown_pct, range_multiplier):
+    entry_price = impulses['impulse_close'] * (1 - entry_drawdown_pct / 100)
+    entry_trigger = df['close'] <= entry_price
+    lp_lower = pd.Series(np.where(entry_trigger, entry_price, np.nan), index=df.index).ffill()
+    lp_upper = pd.Series(np.where(entry_trigger, impulses['impulse_close'] * range_multiplier, np.nan), index=df.index).ffill()
+    return pd.DataFrame({
+        'entry_price': entry_price,
+        'entry_trigger': entry_trigger,
+        'lp_lower': lp_lower,
+        'lp_upper': lp_upper,
+        'in_range': (df['close'] >= lp_lower) & (df['close'] <= lp_upper),
+    })
+
+graph = compute_graph.get_graph(st.session_state, "lp_entry")
+compute_graph.node(graph, "frame", build_frame, inputs={"raw_data": raw_data})
+compute_graph.node(graph, "body", candle_body, deps={"df": "frame"})
+compute_graph.node(graph, "big_body", big_body, inputs={"body_threshold": body_threshold}, deps={"body": "body"})
+compute_graph.node(graph, "high_volume", high_volume, inputs={"vol_window": vol_window}, deps={"df": "frame"})
+compute_graph.node(graph, "impulse", impulse_signals, deps={
+    "df": "frame", "body": "body", "is_big_body": "big_body", "is_high_volume": "high_volume"
+})
+compute_graph.node(graph, "lp_range", lp_range, inputs={
+    "entry_drawdown_pct": entry_drawdown_pct, "range_multiplier": range_multiplier
+}, deps={"df": "frame", "impulses": "impulse"})
+
+df = pd.concat([
+    compute_graph.evaluate(graph, "frame"),
+    compute_graph.evaluate(graph, "body"),
+    compute_graph.evaluate(graph, "big_body").rename('is_big_body'),
+    compute_graph.evaluate(graph, "high_volume").rename('is_high_volume'),
+    compute_graph.evaluate(graph, "impulse"),
+    compute_graph.evaluate(graph, "lp_range"),
+], axis=1)
 
 # === Plotting ===
 fig = go.Figure()
@@ -110,3 +147,6 @@ fig.update_layout(
 )
 
 st.plotly_chart(fig, use_container_width=True)
+
+with st.sidebar.expander("🧮 Recompute Counts"):
+    st.dataframe(compute_graph.counts_frame(graph), use_container_width=True)
@@ -1,7 +1,10 @@
 import streamlit as st
-import pandas as pd
 import requests
 import re
+import compute_graph
+import spot_price
+import charts
+import positions
 
 st.header("Step 4: LP Exit Planner")
 
@@ -26,14 +29,14 @@ def get_lp_from_moralis(token_id):
     return r.json() if r.status_code == 200 else None
 
 # --- ETH Price ---
-if "eth_price" not in st.session_state:
+if st.session_state.get("eth_quote") is None:
     try:
-        r = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd")
-        st.session_state.eth_price = r.json()["ethereum"]["usd"]
-    except:
-        st.session_state.eth_price = 2578
+        st.session_state.eth_quote = spot_price.get_spot_price()
+    except spot_price.PriceUnavailable as e:
+        st.error(f"Could not fetch a live ETH price: {e}")
+        st.stop()
 
-current_price = st.session_state.eth_price
+current_price = st.session_state.eth_quote["price"]
 
 # --- UI ---
 st.subheader("🔗 LP Live Data Integration (Optional)")
@@ -41,37 +44,61 @@ lp_url = st.text_input("Paste Uniswap LP Position URL", "https://app.uniswap.org
 manual_network = st.selectbox("Network", ["arbitrum", "ethereum"], index=0)
 st.text_input("Wallet Address (optional for ETH tracking)", value=wallet_address, disabled=True)
 
-# --- ETH balance ---
-use_live_eth = False
-eth_live = None
-if wallet_address and moralis_key:
+# --- Pipeline nodes (recomputed only when their inputs change) ---
+def fetch_eth_balance(wallet_address, refresh):
     try:
         r = requests.get(f"https://deep-index.moralis.io/api/v2.2/{wallet_address}/balance?chain=eth", headers={
             "X-API-Key": moralis_key,
             "accept": "application/json"
         })
-        eth_live = int(r.json()["balance"]) / 1e18
+        return int(r.json()["balance"]) / 1e18
+    except:
+        return None
+
+def parse_token_id(lp_url):
+    match = re.search(r"uniswap.org/positions/v3/(?:arbitrum|ethereum)/([0-9]+)", lp_url)
+    return match.group(1) if match else None
+
+def fetch_lp(token_id, refresh):
+    return get_lp_from_moralis(token_id) if token_id else None
+
+def lp_bounds(lp):
+    if not (lp and "normalized_metadata" in lp):
+        return None
+    try:
+        tick_lower = int(lp["2"]["tickLower"] if "tickLower" not in lp else lp["tickLower"])
+        tick_upper = int(lp["2"]["tickUpper"] if "tickUpper" not in lp else lp["tickUpper"])
+    except:
+        tick_lower = int(lp["normalized_metadata"]["description"].split("tickLower=")[1].split(",")[0])
+        tick_upper = int(lp["normalized_metadata"]["description"].split("tickUpper=")[1].split(",")[0])
+    return round(tick_to_price_precise(tick_lower), 2), round(tick_to_price_precise(tick_upper), 2)
+
+if st.button("🔄 Refresh Live Data"):
+    st.session_state.lp_refresh = st.session_state.get("lp_refresh", 0) + 1
+refresh = st.session_state.get("lp_refresh", 0)
+
+graph = compute_graph.get_graph(st.session_state, "lp_exit")
+compute_graph.node(graph, "eth_balance", fetch_eth_balance, inputs={"wallet_address": wallet_address, "refresh": refresh})
+compute_graph.node(graph, "token_id", parse_token_id, inputs={"lp_url": lp_url})
+compute_graph.node(graph, "lp", fetch_lp, inputs={"refresh": refresh}, deps={"token_id": "token_id"})
+compute_graph.node(graph, "lp_bounds", lp_bounds, deps={"lp": "lp"})
+
+# --- ETH balance ---
+use_live_eth = False
+eth_live = None
+if wallet_address and moralis_key:
+    eth_live = compute_graph.evaluate(graph, "eth_balance")
+    if eth_live is not None:
         st.success(f"Live ETH Balance: {eth_live:.4f} ETH")
         use_live_eth = st.checkbox("Use live ETH balance to auto-fill stack", value=False)
-    except:
-        pass
 
 # --- Parse URL ---
-lp_low = 2300.0
-lp_high = 2500.0
-match = re.search(r"uniswap.org/positions/v3/(?:arbitrum|ethereum)/([0-9]+)", lp_url)
-if match:
-    token_id = match.group(1)
-    lp = get_lp_from_moralis(token_id)
-    if lp and "normalized_metadata" in lp:
-        try:
-            tick_lower = int(lp["2"]["tickLower"] if "tickLower" not in lp else lp["tickLower"])
-            tick_upper = int(lp["2"]["tickUpper"] if "tickUpper" not in lp else lp["tickUpper"])
-        except:
-            tick_lower = int(lp["normalized_metadata"]["description"].split("tickLower=")[1].split(",")[0])
-            tick_upper = int(lp["normalized_metadata"]["description"].split("tickUpper=")[1].split(",")[0])
-        lp_low = round(tick_to_price_precise(tick_lower), 2)
-        lp_high = round(tick_to_price_precise(tick_upper), 2)
+lp_low, lp_high = positions.LP_RANGE
+if compute_graph.evaluate(graph, "token_id"):
+    lp = compute_graph.evaluate(graph, "lp")
+    bounds = compute_graph.evaluate(graph, "lp_bounds")
+    if bounds:
+        lp_low, lp_high = bounds
         st.success(f"Loaded LP: token0 = {lp.get('name', 'n/a')}, fee = 500, range: {lp_low}—{lp_high}")
     else:
         st.warning("LP position not found or failed to fetch.")
@@ -80,16 +107,25 @@ if match:
 # --- Inputs ---
 lp_low = st.number_input("Your LP Lower Bound ($)", value=lp_low)
 lp_high = st.number_input("Your LP Upper Bound ($)", value=lp_high)
-fees_earned_eth = st.number_input("Estimated Fees Earned (ETH)", value=0.10, step=0.01)
-loop2_debt_usd = st.number_input("Loop 2 USDC Debt ($)", value=4000.0, step=50.0)
-eth_stack = eth_live if use_live_eth and eth_live else st.number_input("Current ETH Stack", value=8.75, step=0.01)
+fees_earned_eth = st.number_input("Estimated Fees Earned (ETH)", value=positions.FEES_EARNED_ETH, step=0.01)
+loop2_debt_usd = st.number_input("Loop 2 USDC Debt ($)", value=positions.LOOP2_DEBT_USD, step=50.0)
+eth_stack = eth_live if use_live_eth and eth_live else st.number_input("Current ETH Stack", value=positions.ETH_STACK, step=0.01)
 
 # --- Sim ---
 st.subheader("Price Scenario Simulation")
 eth_scenario_price = st.slider("Simulate ETH Price ($)", 1000, 5000, int(current_price), step=50)
-collateral_usd = eth_stack * eth_scenario_price
-repayable_eth = loop2_debt_usd / eth_scenario_price
-net_eth = fees_earned_eth - repayable_eth
+
+def scenario(eth_stack, loop2_debt_usd, fees_earned_eth, eth_scenario_price):
+    repayable_eth = loop2_debt_usd / eth_scenario_price
+    return eth_stack * eth_scenario_price, repayable_eth, fees_earned_eth - repayable_eth
+
+compute_graph.node(graph, "scenario", scenario, inputs={
+    "eth_stack": eth_stack,
+    "loop2_debt_usd": loop2_debt_usd,
+    "fees_earned_eth": fees_earned_eth,
+    "eth_scenario_price": eth_scenario_price,
+})
+collateral_usd, repayable_eth, net_eth = compute_graph.evaluate(graph, "scenario")
 
 # --- Range logic ---
 status = "in"
@@ -122,12 +158,7 @@ else:
 
 # --- Summary ---
 st.subheader("P&L Summary")
-st.dataframe(pd.DataFrame({
-    "Scenario Price ($)": [eth_scenario_price],
-    "ETH Stack": [eth_stack],
-    "Collateral Value ($)": [collateral_usd],
-    "Loop 2 Debt ($)": [loop2_debt_usd],
-    "Debt in ETH": [repayable_eth],
-    "Fees Earned (ETH)": [fees_earned_eth],
-    "Net ETH After Repay": [net_eth]
-}))
+st.dataframe(charts.lp_exit_scenarios(eth_stack, loop2_debt_usd, fees_earned_eth, [eth_scenario_price]))
+
+with st.expander("🧮 Recompute Counts"):
+    st.dataframe(compute_graph.counts_frame(graph), use_container_width=True)
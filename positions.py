@@ -0,0 +1,15 @@
+# --- Default position ---
+# The Loop 1 Aave position, Loop 2 debt and Uniswap LP range the pages start from. The
+# dashboards, the LP Exit Strategy Planner, alert_daemon.py and batch_report.py all read
+# these, so updating the position here updates every one of them.
+
+# Loop 1 (Aave)
+SUPPLIED_ETH = 9.41
+BORROWED_USD = 6798.58
+HEALTH_FACTOR = 2.80
+
+# Loop 2 and LP exit planning
+ETH_STACK = 8.75
+LOOP2_DEBT_USD = 4000.0
+FEES_EARNED_ETH = 0.10
+LP_RANGE = (2300.0, 2500.0)
@@ -0,0 +1,269 @@
+import argparse
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+# --- Hedged multi-source ETH spot price ---
+# The healthiest `fanout` sources are queried in parallel. If `quorum` answers haven't arrived
+# by the hedge delay of the slowest launched source a quorum needs, the remaining sources are
+# fired as hedges. The quote is the median of the first `quorum` answers (two by default, so
+# one bad source can't set the price alone), with per-source prices, latencies and staleness.
+# Answers whose source timestamp is older than `max_age` are dropped. When no fresh source
+# answers, PriceUnavailable is raised: callers never get a made-up number.
+#
+#   python spot_price.py             # one live quote
+#   python spot_price.py --bench     # p50/p99 latency against local stub sources
+
+
+class PriceUnavailable(Exception):
+    pass
+
+
+# --- Sources ---
+def _coingecko(timeout):
+    r = requests.get(
+        "https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd&include_last_updated_at=true",
+        timeout=timeout,
+    )
+    r.raise_for_status()
+    data = r.json()["ethereum"]
+    return float(data["usd"]), data.get("last_updated_at")
+
+
+def _dexscreener(timeout):
+    r = requests.get(
+        "https://api.dexscreener.com/latest/dex/pairs/ethereum/0x88e6a0c2ddd26feeb64f039a2c41296fcb3f5640",
+        timeout=timeout,
+    )
+    r.raise_for_status()
+    return float(r.json()["pair"]["priceUsd"]), None
+
+
+def _coinbase(timeout):
+    r = requests.get("https://api.coinbase.com/v2/prices/ETH-USD/spot", timeout=timeout)
+    r.raise_for_status()
+    return float(r.json()["data"]["amount"]), None
+
+
+def _kraken(timeout):
+    r = requests.get("https://api.kraken.com/0/public/Ticker?pair=ETHUSD", timeout=timeout)
+    r.raise_for_status()
+    result = r.json()["result"]
+    return float(next(iter(result.values()))["c"][0]), None
+
+
+SOURCES = {
+    "coingecko": _coingecko,
+    "dexscreener": _dexscreener,
+    "coinbase": _coinbase,
+    "kraken": _kraken,
+}
+
+# --- Source health ---
+HISTORY = 100
+# The hedge delay is a multiple of a source's median latency. A high percentile would be
+# no good here: once ~5% of a 100-sample window is tail, p95 *is* the tail latency.
+MIN_SAMPLES = 5  # below this use the default delay
+HEDGE_MULTIPLE = 2.0
+DEFAULT_HEDGE_DELAY = 0.3
+MIN_HEDGE_DELAY = 0.05
+MAX_HEDGE_DELAY = 1.0
+MAX_QUOTE_AGE = 300.0  # seconds; an older source timestamp means that feed has stalled
+
+_lock = threading.Lock()
+_latencies = {}
+_outcomes = {}
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="spot-price")
+
+
+def _record(name, latency, ok):
+    with _lock:
+        _latencies.setdefault(name, deque(maxlen=HISTORY)).append(latency)
+        _outcomes.setdefault(name, deque(maxlen=HISTORY)).append(ok)
+
+
+def latency_percentile(name, pct, default=None, min_samples=1):
+    with _lock:
+        samples = sorted(_latencies.get(name, ()))
+    if len(samples) < min_samples:
+        return default
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def hedge_delay(name, multiple=HEDGE_MULTIPLE):
+    p50 = latency_percentile(name, 50, min_samples=MIN_SAMPLES)
+    if p50 is None:
+        return DEFAULT_HEDGE_DELAY
+    return min(max(p50 * multiple, MIN_HEDGE_DELAY), MAX_HEDGE_DELAY)
+
+
+def _rank(names):
+    # Healthiest first: recent failure rate, then median latency
+    def score(name):
+        with _lock:
+            outcomes = list(_outcomes.get(name, ()))
+        failure_rate = outcomes.count(False) / len(outcomes) if outcomes else 0.0
+        return failure_rate, latency_percentile(name, 50, default=0.0)
+    return sorted(names, key=score)
+
+
+def source_health(names=None):
+    rows = []
+    for name in names or SOURCES:
+        with _lock:
+            outcomes = list(_outcomes.get(name, ()))
+        rows.append({
+            "source": name,
+            "requests": len(outcomes),
+            "failure_rate": outcomes.count(False) / len(outcomes) if outcomes else None,
+            "p50_ms": (latency_percentile(name, 50) or 0) * 1000,
+            "p95_ms": (latency_percentile(name, 95) or 0) * 1000,
+        })
+    return rows
+
+
+# --- Aggregation ---
+def _launch(sources, name, timeout):
+    start = time.monotonic()
+
+    def call():
+        return sources[name](timeout)
+
+    def done(future):
+        _record(name, time.monotonic() - start, future.exception() is None)
+
+    future = _pool.submit(call)
+    future.add_done_callback(done)
+    return future, start
+
+
+def get_spot_price(sources=None, fanout=2, quorum=2, hedge_multiple=HEDGE_MULTIPLE, timeout=3.0, max_age=MAX_QUOTE_AGE):
+    sources = sources or SOURCES
+    ordered = _rank(list(sources))
+    quorum = min(quorum, len(ordered))
+    start = time.monotonic()
+    deadline = start + timeout
+
+    inflight = {}
+    for name in ordered[:fanout]:
+        inflight[name] = _launch(sources, name, timeout)
+    hedges = ordered[fanout:]
+    # A quorum of q needs the q fastest launched sources, so hedge once the q-th of them is late
+    delays = sorted(hedge_delay(name, hedge_multiple) for name in inflight)
+    hedge_at = start + delays[min(quorum, len(delays)) - 1]
+
+    prices, ages, latencies, errors = {}, {}, {}, {}
+    stale = 0
+    hedged = False
+    while len(prices) < quorum:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        if hedges and (now >= hedge_at or not inflight):
+            for name in hedges:
+                inflight[name] = _launch(sources, name, timeout)
+            hedges = []
+            hedged = True
+        if not inflight:
+            break
+
+        wait_until = min(deadline, hedge_at) if hedges else deadline
+        futures = {future: name for name, (future, _) in inflight.items()}
+        done, _ = wait(futures, timeout=max(0.0, wait_until - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            _, launched = inflight.pop(name)
+            try:
+                price, ts = future.result()
+            except Exception as e:
+                errors[name] = str(e)
+                continue
+            # Sources that don't report a timestamp have unknown age, not zero age
+            age = time.time() - ts if ts else None
+            if max_age is not None and age is not None and age > max_age:
+                errors[name] = f"stale quote ({age:.0f}s old)"
+                stale += 1
+                continue
+            prices[name] = price
+            ages[name] = age
+            latencies[name] = (time.monotonic() - launched) * 1000
+
+    if not prices:
+        if stale:
+            raise PriceUnavailable(f"Only stale ETH quotes (older than {max_age:.0f}s): {errors}")
+        raise PriceUnavailable(f"No ETH price source answered within {timeout:.1f}s: {errors or 'timed out'}")
+
+    known_ages = [age for age in ages.values() if age is not None]
+    return {
+        "price": statistics.median(prices.values()),
+        "sources": prices,
+        "latency_ms": latencies,
+        "errors": errors,
+        "hedged": hedged,
+        "fetched_at": time.time(),
+        "age_s": ages,
+        "staleness_s": max(known_ages) if known_ages else None,
+        "elapsed_ms": (time.monotonic() - start) * 1000,
+    }
+
+
+# --- Local stubs and benchmark ---
+def stub_source(price, median_latency, tail_latency=None, tail_prob=0.0, fail_prob=0.0, seed=None):
+    rng = random.Random(seed)
+
+    def fetch(timeout):
+        slow = rng.random() < tail_prob
+        latency = tail_latency if slow and tail_latency else rng.lognormvariate(0, 0.25) * median_latency
+        time.sleep(min(latency, timeout))
+        if latency > timeout:
+            raise requests.Timeout(f"stub timed out after {timeout}s")
+        if rng.random() < fail_prob:
+            raise requests.ConnectionError("stub failure")
+        return price * (1 + rng.uniform(-0.0005, 0.0005)), time.time()
+    return fetch
+
+
+def bench(n=200):
+    def stubs():
+        return {
+            "primary": stub_source(2600.0, 0.05, tail_latency=1.5, tail_prob=0.03, seed=1),
+            "secondary": stub_source(2600.0, 0.08, tail_latency=1.5, tail_prob=0.03, seed=2),
+            "backup": stub_source(2600.0, 0.12, fail_prob=0.02, seed=3),
+        }
+
+    for label, fanout, quorum in [("single source", 1, 1), ("hedged", 1, 1), ("fanout 2", 2, 1), ("median of 2", 2, 2)]:
+        sources = stubs()
+        if label == "single source":
+            sources = {"primary": sources["primary"]}
+        _latencies.clear()
+        _outcomes.clear()
+        elapsed = []
+        for _ in range(n):
+            try:
+                elapsed.append(get_spot_price(sources, fanout=fanout, quorum=quorum)["elapsed_ms"])
+            except PriceUnavailable:
+                elapsed.append(3000.0)
+        elapsed.sort()
+        print(f"{label:>14}: p50 {elapsed[n // 2]:7.1f} ms   p99 {elapsed[int(n * 0.99) - 1]:7.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hedged multi-source ETH spot price")
+    parser.add_argument("--bench", action="store_true", help="Measure latency against local stub sources")
+    parser.add_argument("-n", type=int, default=200)
+    args = parser.parse_args(argv)
+    if args.bench:
+        bench(args.n)
+        return
+    quote = get_spot_price()
+    print(f"ETH ${quote['price']:,.2f} from {quote['sources']} in {quote['elapsed_ms']:.0f} ms"
+          f"{' (hedged)' if quote['hedged'] else ''}")
+
+
+if __name__ == "__main__":
+    main()